@@ -0,0 +1,188 @@
+"""
+Runs commands of Logy non-interactively and writes JSON lines results.
+
+Every input line is "<operation> <expression>", where operation is one of
+table, fdnf, fcnf, poly, min (min accepts --espresso option like in the
+interpreter), sat, taut or const. Empty lines and lines starting with #
+are skipped.
+
+    python batch.py jobs.txt -o results.jsonl --workers 8 --timeout 10
+
+"""
+import sys
+import json
+import signal
+import argparse
+import multiprocessing
+
+import persistent_store
+from calculation import ConstantError
+from interpreter import ESPRESSO_OPTION, get_calculator
+
+
+class JobTimeout(Exception):
+    pass
+
+
+def table(calculator):
+    return {'header': calculator.truth_table_header(),
+            'rows': [list(row) for block in calculator.iter_truth_table(4096)
+                     for row in block]}
+
+
+def minimized(calculator, argument=''):
+    method = 'espresso' if argument == ESPRESSO_OPTION else 'qmc'
+    function, proven = calculator.minimize_cover(method)
+    return {'function': str(function), 'minimal': proven}
+
+
+def satisfiability(calculator):
+    values = calculator.satisfying_assignment()
+    return {'satisfiable': values is not None,
+            'assignment': None if values is None else dict(values)}
+
+
+def tautology(calculator):
+    values = calculator.satisfying_assignment(0)
+    return {'tautology': values is None,
+            'counterexample': None if values is None else dict(values)}
+
+
+operations = {
+    'table': table,
+    'fdnf': lambda calculator: str(calculator.cast_to_fdnf()),
+    'fcnf': lambda calculator: str(calculator.cast_to_fcnf()),
+    'poly': lambda calculator: str(calculator.cast_to_zhegalkin()),
+    'min': minimized,
+    'sat': satisfiability,
+    'taut': tautology,
+    'const': lambda calculator: calculator.function_is_constant(),
+}
+
+
+def parse_job(line):
+    """Returns operation name, its option and expression of job line."""
+    operation, _, expression = line.strip().partition(' ')
+    expression = expression.strip()
+    option = ''
+    if operation == 'min' and expression.startswith(ESPRESSO_OPTION):
+        option = ESPRESSO_OPTION
+        expression = expression[len(ESPRESSO_OPTION):].strip()
+    return operation, option, expression
+
+
+def run_job(job, timeout=None):
+    """Returns result record of numbered job line."""
+    index, line = job
+    return {'index': index, **execute(*parse_job(line), timeout)}
+
+
+def execute(operation, option, expression, timeout=None):
+    """
+    Returns result record of operation on expression. Errors and exceeded
+    timeout are reported in the record instead of being raised.
+
+    """
+    record = {'operation': operation, 'expression': expression}
+    if operation not in operations:
+        record['error'] = 'Unknown command.'
+        return record
+    if timeout:
+        signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        calculator = get_calculator(expression)
+        arguments = [option] if option else []
+        record['result'] = operations[operation](calculator, *arguments)
+    except ConstantError as error:
+        record['error'] = ('Function always takes one value: '
+                           f'{error.args[-1]}.')
+    except ValueError:
+        record['error'] = 'Expression is not correct'
+    except JobTimeout:
+        record['error'] = f'Timeout of {timeout} s is exceeded.'
+    except Exception as error:
+        record['error'] = f'{error.__class__.__name__}: {error}'
+    finally:
+        if timeout:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    return record
+
+
+def run_batch(lines, workers=None, ordered=True, timeout=None,
+              chunksize=64, store=None):
+    """
+    Yields result records of job lines computed by pool of workers,
+    in input order or, if not ordered, in completion order. If store
+    path is given, results are kept in persistent store of the path.
+
+    """
+    jobs = ((index, line) for index, line in enumerate(lines)
+            if line.strip() and not line.lstrip().startswith('#'))
+    if workers == 1:
+        initialize_worker(store)
+        for job in jobs:
+            yield run_job(job, timeout)
+        return
+    with multiprocessing.Pool(workers, initializer=initialize_worker,
+                              initargs=(store,)) as pool:
+        arguments = ((job, timeout) for job in jobs)
+        mapping = pool.imap if ordered else pool.imap_unordered
+        yield from mapping(_run_job_arguments, arguments, chunksize)
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(
+        description='Runs Logy commands from file or stdin and writes '
+                    'JSON lines results.')
+    parser.add_argument('input', nargs='?', default='-',
+                        help='file of job lines, stdin by default')
+    parser.add_argument('-o', '--output', default='-',
+                        help='file of results, stdout by default')
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help='count of worker processes, CPU count by '
+                             'default')
+    parser.add_argument('-t', '--timeout', type=float, default=None,
+                        help='time limit of one job in seconds')
+    parser.add_argument('--chunksize', type=int, default=64,
+                        help='count of jobs sent to worker at once')
+    parser.add_argument('--unordered', action='store_true',
+                        help='write results in completion order')
+    parser.add_argument('--store',
+                        help='SQLite file keeping results between runs')
+    options = parser.parse_args(arguments)
+
+    source = (sys.stdin if options.input == '-'
+              else open(options.input, encoding='utf-8'))
+    output = (sys.stdout if options.output == '-'
+              else open(options.output, 'w', encoding='utf-8'))
+    try:
+        records = run_batch(source, options.workers, not options.unordered,
+                            options.timeout, options.chunksize,
+                            options.store)
+        for record in records:
+            output.write(json.dumps(record) + '\n')
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+
+
+def _run_job_arguments(arguments):
+    return run_job(*arguments)
+
+
+def _raise_timeout(signal_number, frame):
+    raise JobTimeout
+
+
+def initialize_worker(store):
+    if multiprocessing.parent_process() is not None:
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if store:
+        persistent_store.open_store(store)
+
+
+if __name__ == '__main__':
+    main()
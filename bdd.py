@@ -0,0 +1,163 @@
+import sys
+
+import boolean_ast as ast
+
+
+FALSE = 0
+TRUE = 1
+
+
+class BDD(object):
+    """
+    Reduced ordered binary decision diagrams over given variable order.
+
+    Nodes are integers, 0 and 1 are terminals, every other node is a
+    (level, low, high) triple stored once in the unique table, results of
+    ite are kept in the computed table.
+
+    """
+    def __init__(self, variables):
+        self.variables = list(variables)
+        self.levels = {v: i for i, v in enumerate(self.variables)}
+        terminal = (len(self.variables), None, None)
+        self.nodes = [terminal, terminal]
+        self.unique_table = {}
+        self.computed_table = {}
+
+    def __repr__(self):
+        return f'BDD: {self.variables}, {len(self.nodes)} nodes'
+
+    def __sizeof__(self):
+        """Returns estimated size of nodes and tables in bytes."""
+        return (object.__sizeof__(self) + sys.getsizeof(self.nodes)
+                + sys.getsizeof(self.unique_table)
+                + sys.getsizeof(self.computed_table)
+                + 64 * len(self.nodes) + 64 * len(self.computed_table))
+
+    def node(self, level, low, high):
+        if low == high:
+            return low
+        key = level, low, high
+        node = self.unique_table.get(key)
+        if node is None:
+            node = len(self.nodes)
+            self.nodes.append(key)
+            self.unique_table[key] = node
+        return node
+
+    def variable(self, name):
+        if name not in self.levels:
+            raise ValueError(f'No such variable in BDD order: {name}')
+        return self.node(self.levels[name], FALSE, TRUE)
+
+    def ite(self, f, g, h):
+        """Returns node of "if f then g else h"."""
+        if f == TRUE:
+            return g
+        if f == FALSE:
+            return h
+        if g == h:
+            return g
+        if g == TRUE and h == FALSE:
+            return f
+        key = f, g, h
+        if key in self.computed_table:
+            return self.computed_table[key]
+
+        level = min(self.nodes[f][0], self.nodes[g][0], self.nodes[h][0])
+        f0, f1 = self._cofactors(f, level)
+        g0, g1 = self._cofactors(g, level)
+        h0, h1 = self._cofactors(h, level)
+        node = self.node(level, self.ite(f0, g0, h0), self.ite(f1, g1, h1))
+        self.computed_table[key] = node
+        return node
+
+    def negate(self, f):
+        return self.ite(f, FALSE, TRUE)
+
+    def conjunction(self, f, g):
+        return self.ite(f, g, FALSE)
+
+    def disjunction(self, f, g):
+        return self.ite(f, TRUE, g)
+
+    def exclusive_disjunction(self, f, g):
+        return self.ite(f, self.negate(g), g)
+
+    def build(self, expression):
+        """Returns node of expression built bottom-up over its tree."""
+        nodes = {}
+        for subexpression in expression.postorder():
+            operands = [nodes[id(o)] for o in subexpression.operands]
+            if isinstance(subexpression, ast.ConstantExpression):
+                node = TRUE if subexpression.value else FALSE
+            elif isinstance(subexpression, ast.VariableExpression):
+                node = self.variable(subexpression.name)
+            else:
+                operation = operations[subexpression.__class__]
+                node = operation(self, *operands)
+            nodes[id(subexpression)] = node
+        return nodes[id(expression)]
+
+    @staticmethod
+    def is_constant(f):
+        return f == FALSE or f == TRUE
+
+    def satisfy_count(self, f):
+        """Returns count of rows where node takes value 1."""
+        counts = {FALSE: 0, TRUE: 1}
+        stack = [f]
+        while stack:
+            node = stack[-1]
+            if node in counts:
+                stack.pop()
+                continue
+            level, low, high = self.nodes[node]
+            missing = [n for n in (low, high) if n not in counts]
+            if missing:
+                stack.extend(missing)
+                continue
+            stack.pop()
+            counts[node] = (self._scaled(counts[low], level, low)
+                            + self._scaled(counts[high], level, high))
+        return self._scaled(counts[f], -1, f)
+
+    def satisfy_all(self, f):
+        """Yields values of variables for rows with 1 in row order."""
+        count = len(self.variables)
+        stack = [(f, 0, ())]
+        while stack:
+            node, level, values = stack.pop()
+            if node == FALSE:
+                continue
+            if level == count:
+                yield values
+                continue
+            node_level, low, high = self.nodes[node]
+            if node_level != level:
+                low = high = node
+            stack.append((high, level + 1, values + (1,)))
+            stack.append((low, level + 1, values + (0,)))
+
+    def _scaled(self, count, level, node):
+        return count << (self.nodes[node][0] - level - 1)
+
+    def _cofactors(self, f, level):
+        node_level, low, high = self.nodes[f]
+        if node_level != level:
+            return f, f
+        return low, high
+
+
+operations = {
+    ast.NotExpression: BDD.negate,
+    ast.AndExpression: BDD.conjunction,
+    ast.OrExpression: BDD.disjunction,
+    ast.XorExpression: BDD.exclusive_disjunction,
+    ast.NandExpression:
+        lambda bdd, f, g: bdd.negate(bdd.conjunction(f, g)),
+    ast.NorExpression:
+        lambda bdd, f, g: bdd.negate(bdd.disjunction(f, g)),
+    ast.ImplyExpression: lambda bdd, f, g: bdd.ite(f, g, TRUE),
+    ast.EqExpression: lambda bdd, f, g: bdd.ite(f, g, bdd.negate(g)),
+}
@@ -0,0 +1,31 @@
+"""
+Compares combinator and Pratt parse engines on generated expressions.
+
+Run from the repository root:
+    python -m benchmarks.parse_engines
+
+"""
+import random
+import timeit
+
+import boolean_lexer as blex
+import boolean_parser as bparser
+from formulas import random_expression
+
+
+def main(count=2000, variables=5, leaves=32, depth=6, repeat=3, seed=0):
+    rand = random.Random(seed)
+    tokens_list = [blex.lex(random_expression(rand, variables, leaves, depth))
+                   for _ in range(count)]
+    token_count = sum(len(tokens) for tokens in tokens_list)
+    print(f'{count} expressions, {token_count} tokens')
+    for engine in ['combinator', 'pratt']:
+        seconds = min(timeit.repeat(
+            lambda: [bparser.parse(t, engine=engine) for t in tokens_list],
+            number=1, repeat=repeat))
+        print(f'{engine:<12}{seconds:.4f} s'
+              f'{token_count / seconds:>14.0f} tokens/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+"""
+Times lexer, parser and every calculation mode on generated formulas of
+growing variable count and compares runs with a JSON baseline.
+
+Run from the repository root:
+    python -m benchmarks.suite --save benchmarks/baseline.json
+    python -m benchmarks.suite --compare benchmarks/baseline.json
+
+Formula of every variable count is generated from its own fixed seed, so
+runs time the same workloads whichever counts are chosen. Caches are
+cleared before every call.
+
+"""
+import sys
+import json
+import random
+import timeit
+import argparse
+import platform
+
+import boolean_lexer as blex
+import result_cache
+from boolean_parser import parse
+from calculation import BooleanCalculator, compiled
+from formulas import random_expression
+
+
+VARIABLE_COUNTS = [2, 4, 6, 8, 10, 12, 14, 16, 18, 20]
+
+# Largest variable count each operation is timed on, the rest grow too
+# fast to be measured in a run of reasonable length.
+OPERATIONS = {
+    'lex': (lambda case: blex.lex(case.expression), 20),
+    'parse': (lambda case: parse(case.tokens), 20),
+    'build_truth_table':
+        (lambda case: case.calculator().build_truth_table(), 20),
+    'cast_to_fdnf': (lambda case: case.calculator().cast_to_fdnf(), 14),
+    'cast_to_fcnf': (lambda case: case.calculator().cast_to_fcnf(), 14),
+    'cast_to_zhegalkin':
+        (lambda case: case.calculator().cast_to_zhegalkin(), 16),
+    'minimize': (lambda case: case.calculator().minimize(), 10),
+}
+
+
+class Case(object):
+    """Generated formula of count variables and leaves leaves."""
+    def __init__(self, rand, count, leaves, depth):
+        self.count = count
+        while True:
+            self.expression = random_expression(rand, count, leaves, depth)
+            self.tokens = blex.lex(self.expression)
+            self.function = parse(self.tokens)
+            if (len(self.function.variables) == count
+                    and not self.calculator().function_is_constant()):
+                break
+
+    def calculator(self):
+        return BooleanCalculator(self.function)
+
+
+def run(counts, leaves_per_variable=3, depth=8, repeat=3, seed=0):
+    """Returns results as {operation: {variable count: seconds}}."""
+    cases = [Case(random.Random(f'{seed}:{count}'), count,
+                  leaves_per_variable * count, depth)
+             for count in counts]
+    results = {}
+    for name, (operation, max_count) in OPERATIONS.items():
+        results[name] = {}
+        for case in cases:
+            if case.count > max_count:
+                continue
+            timer = timeit.Timer(lambda: _uncached(operation, case))
+            number = _number(timer)
+            seconds = min(timer.repeat(repeat, number)) / number
+            results[name][str(case.count)] = seconds
+    return results
+
+
+def print_results(results, baseline=None, tolerance=0.25):
+    """
+    Prints scaling curves of operations, with ratios to baseline if it
+    is given. Returns names of regressed measurements.
+
+    """
+    regressions = []
+    for name, curve in results.items():
+        print(name)
+        for count, seconds in curve.items():
+            line = f'  {count:>3} variables {_format_seconds(seconds)}'
+            old = (baseline or {}).get(name, {}).get(count)
+            if old:
+                ratio = seconds / old
+                line += f'  x{ratio:.2f} of baseline'
+                if ratio > 1 + tolerance:
+                    line += '  REGRESSION'
+                    regressions.append(f'{name}/{count}')
+            print(line)
+    return regressions
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(
+        description='Benchmarks Logy on generated formulas.')
+    parser.add_argument('--counts', default=','.join(map(str,
+                                                         VARIABLE_COUNTS)),
+                        help='comma separated variable counts')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--save', help='writes results to JSON file')
+    parser.add_argument('--compare', help='JSON baseline to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='allowed slowdown before regression')
+    options = parser.parse_args(arguments)
+
+    counts = [int(count) for count in options.counts.split(',')]
+    results = run(counts, repeat=options.repeat, seed=options.seed)
+    baseline = None
+    if options.compare:
+        with open(options.compare) as file:
+            baseline = json.load(file)['results']
+    regressions = print_results(results, baseline, options.tolerance)
+    if options.save:
+        with open(options.save, 'w') as file:
+            json.dump({'python': platform.python_version(),
+                       'machine': platform.machine(),
+                       'seed': options.seed,
+                       'results': results}, file, indent=2)
+            file.write('\n')
+    if regressions:
+        print(f'Regressions: {", ".join(regressions)}')
+        sys.exit(1)
+
+
+def _number(timer, min_seconds=0.05):
+    """Returns count of calls taking at least min_seconds, at most 1000."""
+    number = 1
+    while number < 1000 and timer.timeit(number) < min_seconds:
+        number *= 10
+    return number
+
+
+def _uncached(operation, case):
+    result_cache.cache.clear()
+    compiled.cache_clear()
+    return operation(case)
+
+
+def _format_seconds(seconds):
+    if seconds < 1e-3:
+        return f'{seconds * 1e6:10.1f} us'
+    if seconds < 1:
+        return f'{seconds * 1e3:10.2f} ms'
+    return f'{seconds:10.3f} s '
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+import sys
+from abc import ABC, abstractmethod
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class PackedVectors(ABC):
+    """
+    Packs truth table columns into vectors with one bit per row.
+
+    Rows are ordered like the subsets of variables, so the first variable
+    is the most significant bit of the row index.
+
+    """
+    def __init__(self, count):
+        self.count = count
+        self.rows = 2 ** count
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}: {self.count}'
+
+    def variables(self):
+        return [self.variable(i) for i in range(self.count)]
+
+    @abstractmethod
+    def variable(self, index):
+        pass
+
+    @abstractmethod
+    def true_rows(self, vector):
+        pass
+
+    def row_values(self, row):
+        if not self.count:
+            return []
+        return [int(x) for x in format(row, f'0{self.count}b')]
+
+
+class BitVectors(PackedVectors):
+    """Bit i of an integer vector holds the value of the column in row i."""
+    def __init__(self, count):
+        super().__init__(count)
+        self.ones = (1 << self.rows) - 1
+
+    def __sizeof__(self):
+        """Returns size including the all-ones vector in bytes."""
+        return object.__sizeof__(self) + sys.getsizeof(self.ones)
+
+    def variable(self, index):
+        period = 1 << (self.count - 1 - index)
+        vector = ((1 << period) - 1) << period
+        length = 2 * period
+        while length < self.rows:
+            vector |= vector << length
+            length *= 2
+        return vector
+
+    def mobius(self, vector):
+        """
+        Returns algebraic normal form coefficients of vector, bit i is
+        the coefficient of conjunction of variables set in row i.
+
+        """
+        for index in range(self.count):
+            low_rows = self.ones ^ self.variable(index)
+            vector ^= (vector & low_rows) << (1 << (self.count - 1 - index))
+        return vector
+
+    @staticmethod
+    def bit(vector, row):
+        return (vector >> row) & 1
+
+    def true_rows(self, vector):
+        bits = format(vector, f'0{self.rows}b')[::-1]
+        row = bits.find('1')
+        while row != -1:
+            yield row
+            row = bits.find('1', row + 1)
+
+
+class NumpyVectors(PackedVectors):
+    """Bit i of a uint8 array vector is bit i % 8 of byte i // 8."""
+    def __init__(self, count):
+        if np is None:
+            raise ImportError('NumPy is required for vectorized mode.')
+        super().__init__(count)
+        self.size = (self.rows + 7) // 8
+        self.ones = np.full(self.size, 0xFF, dtype=np.uint8)
+        if self.rows % 8:
+            self.ones[-1] = (1 << (self.rows % 8)) - 1
+
+    def __sizeof__(self):
+        """Returns size including the all-ones vector in bytes."""
+        return object.__sizeof__(self) + self.ones.nbytes
+
+    def variable(self, index):
+        shift = self.count - 1 - index
+        if shift < 3:
+            byte = sum(((j >> shift) & 1) << j for j in range(8))
+            vector = np.full(self.size, byte, dtype=np.uint8)
+        else:
+            period = 1 << (shift - 3)
+            block = np.repeat(np.array([0, 0xFF], dtype=np.uint8), period)
+            vector = np.tile(block, self.size // (2 * period))
+        return vector & self.ones
+
+    @staticmethod
+    def bit(vector, row):
+        return int(vector[row >> 3] >> (row & 7)) & 1
+
+    def true_rows(self, vector):
+        bits = np.unpackbits(vector, count=self.rows, bitorder='little')
+        for row in np.flatnonzero(bits):
+            yield int(row)
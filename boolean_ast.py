@@ -1,18 +1,65 @@
-from abc import ABC, abstractmethod
+import functools
+from abc import ABC, ABCMeta, abstractmethod
+from array import array
+from collections import OrderedDict
+from weakref import WeakValueDictionary
 
 import boolean_lexer as blex
 
 
-class Expression(ABC):
-    def __init__(self):
-        self.parent = None
+class HashConsing(ABCMeta):
+    """
+    Returns already existing node for the same class and arguments,
+    so structurally identical subtrees are one object.
+
+    """
+    nodes = WeakValueDictionary()
+
+    def __call__(cls, *args):
+        key = (cls, *args)
+        node = cls.nodes.get(key)
+        if node is None:
+            node = super().__call__(*args)
+            cls.nodes[key] = node
+        return node
+
+
+class Expression(ABC, metaclass=HashConsing):
+    __slots__ = ('_variables', '__weakref__')
+
+    def __init__(self, variables):
+        self._variables = variables
 
     @abstractmethod
     def __repr__(self):
         pass
 
-    @abstractmethod
     def __str__(self):
+        return self.view()
+
+    def __reduce__(self):
+        return self.__class__, self.operands
+
+    def view(self, outer_level=0):
+        """Returns string of expression inside operation of outer_level."""
+        parts = []
+        stack = [(self, outer_level)]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, str):
+                parts.append(item)
+            else:
+                node, level = item
+                stack.extend(reversed(node.view_parts(level)))
+        return ''.join(parts)
+
+    @abstractmethod
+    def view_parts(self, outer_level):
+        """
+        Returns view as list of strings and (operand, outer level) pairs
+        standing for views of operands.
+
+        """
         pass
 
     def __and__(self, other):
@@ -28,56 +75,189 @@ class Expression(ABC):
         return NotExpression(self)
 
     @property
-    @abstractmethod
     def variables(self):
-        pass
+        return self._variables
 
-    @abstractmethod
     def calculate(self, variable_values):
+        """Returns value of expression for mapping of variables to 0 or 1."""
+        program = _cached_program(self)
+        try:
+            values = [variable_values[name] for name in program.variables]
+        except KeyError:
+            raise ValueError('No such variable value in given variables.')
+        return int(program.run(values))
+
+    @property
+    def operands(self):
+        return ()
+
+    @abstractmethod
+    def source(self, *operands):
         pass
 
+    def postorder(self):
+        """Yields every distinct node once, operands before operations."""
+        visited = set()
+        stack = [(self, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if id(node) in visited:
+                continue
+            if expanded:
+                visited.add(id(node))
+                yield node
+            else:
+                stack.append((node, True))
+                for operand in reversed(node.operands):
+                    stack.append((operand, False))
+
+    def repeated_subterms(self):
+        """Returns operations used more than once in expression."""
+        uses = {}
+        for node in self.postorder():
+            for operand in node.operands:
+                uses[operand] = uses.get(operand, 0) + 1
+        return [node for node, count in uses.items()
+                if count > 1 and node.operands]
+
+    def program(self, variables=None):
+        """
+        Returns postfix program of expression over variables, sorted if
+        not given. Subexpressions used more than once are computed once
+        and then loaded from slots.
+
+        """
+        if variables is None:
+            variables = sorted(self.variables)
+        indexes = {name: i for i, name in enumerate(variables)}
+        shared = set(self.repeated_subterms())
+        slots = {}
+        opcodes = array('B')
+        arguments = array('q')
+        stack = [(self, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if node in slots:
+                opcodes.append(LOAD)
+                arguments.append(slots[node])
+            elif isinstance(node, VariableExpression):
+                if node.name not in indexes:
+                    raise ValueError(
+                        'No such variable value in given variables.')
+                opcodes.append(VARIABLE)
+                arguments.append(indexes[node.name])
+            elif isinstance(node, ConstantExpression):
+                opcodes.append(CONSTANT)
+                arguments.append(node.value)
+            elif expanded:
+                opcodes.append(opcode_of[node.__class__])
+                arguments.append(0)
+                if node in shared:
+                    slots[node] = len(slots)
+                    opcodes.append(STORE)
+                    arguments.append(slots[node])
+            else:
+                stack.append((node, True))
+                stack.extend((o, False) for o in reversed(node.operands))
+        return Program(variables, opcodes, arguments, len(slots))
+
+    def compile(self, variables=None):
+        """
+        Returns flat Python function of positional variable values.
+        Variables are taken in sorted order if not given. Values may be
+        0 and 1 or packed vectors, then _ones should be the all-ones
+        vector.
+
+        """
+        if variables is None:
+            variables = sorted(self.variables)
+        arguments = OrderedDict((name, f'v{i}')
+                                for i, name in enumerate(variables))
+        nodes = list(self.postorder())
+        last_uses = {}
+        for position, node in enumerate(nodes):
+            for operand in node.operands:
+                last_uses[id(operand)] = position
+
+        # Names of temporaries are reused after their last use, so big
+        # vectors of finished subexpressions are freed during the call.
+        names = {}
+        free_names = []
+        temporaries = 0
+        lines = []
+        for position, node in enumerate(nodes):
+            if isinstance(node, VariableExpression):
+                if node.name not in arguments:
+                    raise ValueError(
+                        'No such variable value in given variables.')
+                names[id(node)] = arguments[node.name]
+                continue
+            operands = [names[id(o)] for o in node.operands]
+            for operand in set(node.operands):
+                if (last_uses[id(operand)] == position
+                        and names[id(operand)].startswith('t')):
+                    free_names.append(names[id(operand)])
+            if free_names:
+                name = free_names.pop()
+            else:
+                name = f't{temporaries}'
+                temporaries += 1
+            names[id(node)] = name
+            lines.append(f'    {name} = {node.source(*operands)}')
+        lines.append(f'    return {names[id(self)]}')
+        signature = ', '.join([*arguments.values(), '_ones=1'])
+        source = f'def function({signature}):\n' + '\n'.join(lines)
+
+        namespace = {}
+        exec(compile(source, '<boolean_ast>', 'exec'), namespace)
+        function = namespace['function']
+        function.source = source
+        return function
+
 
 class ConstantExpression(Expression):
+    __slots__ = ('value',)
+
     def __init__(self, value):
-        super().__init__()
+        super().__init__(frozenset())
         self.value = value
 
     def __repr__(self):
         return f'{self.value}'
 
-    def __str__(self):
-        return self.__repr__()
+    def __reduce__(self):
+        return self.__class__, (self.value,)
 
-    @property
-    def variables(self):
-        return set()
+    def view_parts(self, outer_level):
+        return [self.__repr__()]
 
-    def calculate(self, variable_values):
-        return self.value
+    def source(self):
+        return '_ones' if self.value else '_ones & 0'
 
 
 class VariableExpression(Expression):
+    __slots__ = ('name',)
+
     def __init__(self, name):
-        super().__init__()
+        super().__init__(frozenset([name]))
         self.name = name
 
     def __repr__(self):
         return self.name
 
-    def __str__(self):
-        return self.__repr__()
+    def __reduce__(self):
+        return self.__class__, (self.name,)
 
-    @property
-    def variables(self):
-        return {self.name}
+    def view_parts(self, outer_level):
+        return [self.__repr__()]
 
-    def calculate(self, variable_values):
-        if self.name not in variable_values:
-            raise ValueError('No such variable value in given variables.')
-        return variable_values[self.name]
+    def source(self):
+        return self.name
 
 
 class OperationExpression(Expression):
+    __slots__ = ()
+
     @property
     @abstractmethod
     def precedence_level(self):
@@ -85,171 +265,239 @@ class OperationExpression(Expression):
 
 
 class NotExpression(OperationExpression):
+    __slots__ = ('expression',)
+
     def __init__(self, expression):
-        super().__init__()
+        super().__init__(expression.variables)
         self.expression = expression
-        self.expression.parent = self
 
     def __repr__(self):
-        return f'NOT({self.expression})'
+        return f'NOT({self.expression.view(self.precedence_level)})'
 
-    def __str__(self):
-        return f'{blex.NOT}{self.expression}'
+    def view_parts(self, outer_level):
+        return [blex.NOT, (self.expression, self.precedence_level)]
 
     @property
     def precedence_level(self):
         return 4
 
     @property
-    def variables(self):
-        return self.expression.variables
+    def operands(self):
+        return self.expression,
 
-    def calculate(self, variable_values):
-        result = not self.expression.calculate(variable_values)
-        return int(result)
+    def source(self, operand):
+        return f'_ones ^ {operand}'
 
 
 class BinaryExpression(OperationExpression):
+    __slots__ = ('left', 'right')
+
     def __init__(self, left, right):
-        super().__init__()
+        super().__init__(left.variables | right.variables)
         self.left = left
-        self.left.parent = self
         self.right = right
-        self.right.parent = self
 
     def __repr__(self):
-        return '{}' + f'({self.left}, {self.right})'
+        return '{}' + (f'({self.left.view(self.precedence_level)}, '
+                       f'{self.right.view(self.precedence_level)})')
 
-    def __str__(self):
-        view = f'{self.left}' + ' {} ' + f'{self.right}'
-        if (self.parent is not None
-                and self.parent.precedence_level > self.precedence_level):
-            view = f'({view})'
-        return view
+    def view_parts(self, outer_level):
+        parts = [(self.left, self.precedence_level), f' {self.symbol} ',
+                 (self.right, self.precedence_level)]
+        if outer_level > self.precedence_level:
+            parts = ['(', *parts, ')']
+        return parts
+
+    @staticmethod
+    @abstractmethod
+    def combine_vectors(left_vector, right_vector, ones):
+        pass
 
     @property
-    def variables(self):
-        return self.left.variables | self.right.variables
+    def operands(self):
+        return self.left, self.right
+
+    def source(self, left, right):
+        return self.source_template.format(left, right)
 
 
 class AndExpression(BinaryExpression):
+    __slots__ = ()
+    source_template = '{} & {}'
+    symbol = blex.AND
+
     def __repr__(self):
         return super().__repr__().format('AND')
 
-    def __str__(self):
-        return super().__str__().format(blex.AND)
-
     @property
     def precedence_level(self):
         return 3
 
-    def calculate(self, variable_values):
-        result = (self.left.calculate(variable_values)
-                  and self.right.calculate(variable_values))
-        return int(result)
+    @staticmethod
+    def combine_vectors(left_vector, right_vector, ones):
+        return left_vector & right_vector
 
 
 class OrExpression(BinaryExpression):
+    __slots__ = ()
+    source_template = '{} | {}'
+    symbol = blex.OR
+
     def __repr__(self):
         return super().__repr__().format('OR')
 
-    def __str__(self):
-        return super().__str__().format(blex.OR)
-
     @property
     def precedence_level(self):
         return 2
 
-    def calculate(self, variable_values):
-        result = (self.left.calculate(variable_values)
-                  or self.right.calculate(variable_values))
-        return int(result)
+    @staticmethod
+    def combine_vectors(left_vector, right_vector, ones):
+        return left_vector | right_vector
 
 
 class XorExpression(BinaryExpression):
+    __slots__ = ()
+    source_template = '{} ^ {}'
+    symbol = blex.XOR
+
     def __repr__(self):
         return super().__repr__().format('XOR')
 
-    def __str__(self):
-        return super().__str__().format(blex.XOR)
-
     @property
     def precedence_level(self):
         return 1
 
-    def calculate(self, variable_values):
-        left_value = self.left.calculate(variable_values)
-        right_value = self.right.calculate(variable_values)
-        result = ((not left_value and right_value)
-                  or (left_value and not right_value))
-        return int(result)
+    @staticmethod
+    def combine_vectors(left_vector, right_vector, ones):
+        return left_vector ^ right_vector
 
 
 class NorExpression(BinaryExpression):
+    __slots__ = ()
+    source_template = '_ones ^ ({} | {})'
+    symbol = blex.NOR
+
     def __repr__(self):
         return super().__repr__().format('NOR')
 
-    def __str__(self):
-        return super().__str__().format(blex.NOR)
-
     @property
     def precedence_level(self):
         return 2
 
-    def calculate(self, variable_values):
-        result = not (self.left.calculate(variable_values)
-                      or self.right.calculate(variable_values))
-        return int(result)
+    @staticmethod
+    def combine_vectors(left_vector, right_vector, ones):
+        return ones ^ (left_vector | right_vector)
 
 
 class NandExpression(BinaryExpression):
+    __slots__ = ()
+    source_template = '_ones ^ ({} & {})'
+    symbol = blex.NAND
+
     def __repr__(self):
         return super().__repr__().format('NAND')
 
-    def __str__(self):
-        return super().__str__().format(blex.NAND)
-
     @property
     def precedence_level(self):
         return 3
 
-    def calculate(self, variable_values):
-        result = not (self.left.calculate(variable_values)
-                      and self.right.calculate(variable_values))
-        return int(result)
+    @staticmethod
+    def combine_vectors(left_vector, right_vector, ones):
+        return ones ^ (left_vector & right_vector)
 
 
 class ImplyExpression(BinaryExpression):
+    __slots__ = ()
+    source_template = '(_ones ^ {}) | {}'
+    symbol = blex.IMPLY
+
     def __repr__(self):
         return super().__repr__().format('IMPLY')
 
-    def __str__(self):
-        return super().__str__().format(blex.IMPLY)
-
     @property
     def precedence_level(self):
         return 1
 
-    def calculate(self, variable_values):
-        result = (not self.left.calculate(variable_values)
-                  or self.right.calculate(variable_values))
-        return int(result)
+    @staticmethod
+    def combine_vectors(left_vector, right_vector, ones):
+        return (ones ^ left_vector) | right_vector
 
 
 class EqExpression(BinaryExpression):
+    __slots__ = ()
+    source_template = '_ones ^ {} ^ {}'
+    symbol = blex.EQ
+
     def __repr__(self):
         return super().__repr__().format('EQ')
 
-    def __str__(self):
-        return super().__str__().format(blex.EQ)
-
     @property
     def precedence_level(self):
         return 1
 
-    def calculate(self, variable_values):
-        left_value = self.left.calculate(variable_values)
-        right_value = self.right.calculate(variable_values)
-        result = ((not left_value and not right_value)
-                  or left_value and right_value)
-        return int(result)
+    @staticmethod
+    def combine_vectors(left_vector, right_vector, ones):
+        return ones ^ left_vector ^ right_vector
+
+
+VARIABLE, CONSTANT, LOAD, STORE, NOT = range(5)
+binary_classes = [AndExpression, OrExpression, XorExpression, NorExpression,
+                  NandExpression, ImplyExpression, EqExpression]
+opcode_of = {cls: NOT + 1 + i for i, cls in enumerate(binary_classes)}
+opcode_of[NotExpression] = NOT
+combiners = [None] * (NOT + 1) + [cls.combine_vectors
+                                  for cls in binary_classes]
+
+
+class Program(object):
+    """
+    Expression lowered to postfix instructions of a stack machine.
+
+    Instruction i is opcodes[i] with arguments[i], which is index of
+    variable for VARIABLE, value for CONSTANT and slot of shared
+    subexpression for LOAD and STORE. Operations pop their operands and
+    push the result, STORE keeps the top of stack in its slot.
+
+    """
+    def __init__(self, variables, opcodes, arguments, slot_count):
+        self.variables = list(variables)
+        self.opcodes = opcodes
+        self.arguments = arguments
+        self.slot_count = slot_count
+
+    def __repr__(self):
+        return f'Program: {len(self)} instructions, {self.slot_count} slots'
+
+    def __len__(self):
+        return len(self.opcodes)
+
+    def run(self, values, ones=1):
+        """
+        Returns result for values of variables, values may be 0 and 1 or
+        packed vectors, then ones should be the all-ones vector.
+
+        """
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        slots = [None] * self.slot_count
+        for opcode, argument in zip(self.opcodes, self.arguments):
+            if opcode == VARIABLE:
+                push(values[argument])
+            elif opcode == LOAD:
+                push(slots[argument])
+            elif opcode == NOT:
+                push(ones ^ pop())
+            elif opcode == STORE:
+                slots[argument] = stack[-1]
+            elif opcode == CONSTANT:
+                push(ones if argument else ones & 0)
+            else:
+                right = pop()
+                push(combiners[opcode](pop(), right, ones))
+        return pop()
+
+
+@functools.lru_cache(maxsize=256)
+def _cached_program(expression):
+    return expression.program()
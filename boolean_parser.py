@@ -5,19 +5,57 @@ import boolean_lexer as blex
 import language_analysis.combinators as cmb
 
 
-def parse(tokens):
-    parsed = parser()(tokens, 0)
+def parse(tokens, packrat=False, engine='combinator'):
+    """
+    Returns tree of tokens. Packrat memoization is opt-in and never saves
+    work on this grammar, which does not backtrack.
+
+    Raises:
+        ValueError: An error occurred parsing tokens or if expression is
+        nested too deeply.
+
+    """
+    try:
+        if engine == 'pratt':
+            return PrattParser(tokens).parse()
+        if engine != 'combinator':
+            raise ValueError(f'Unknown parse engine: {engine}')
+        if packrat:
+            try:
+                parsed = packrat_grammar(tokens, 0)
+            finally:
+                memo_table.reset()
+        else:
+            parsed = grammar(tokens, 0)
+    except RecursionError:
+        raise ValueError('Expression is nested too deeply.')
     if parsed is None:
         raise ValueError(f'Can not parse tokens: {tokens}')
-    return parser()(tokens, 0).tree
+    return parsed.tree
 
 
-def parser():
-    return cmb.Phrase(boolean())
+def parser(table=None):
+    """
+    Returns grammar, its terms and expressions are memoized in table if
+    it is given and not wrapped at all otherwise. Nested terms and
+    groups refer lazily to the same parsers, so the grammar is cyclic.
 
+    """
+    rules = {}
+    rules['term'] = memoized(
+        term(lambda: rules['term'], lambda: rules['boolean']), table)
+    rules['boolean'] = memoized(boolean(rules['term']), table)
+    return cmb.Phrase(rules['boolean'])
 
-def boolean():
-    return precedence(term(), precedence_levels, binary_nodes)
+
+def memoized(parser, table):
+    if table is None:
+        return parser
+    return cmb.Memo(parser, table)
+
+
+def boolean(term_parser):
+    return precedence(term_parser, precedence_levels, binary_nodes)
 
 
 def precedence(value_parser, precedence_levels, combine):
@@ -36,8 +74,9 @@ def binary_nodes(operator):
     return lambda l, r: operator_nodes[operator](l, r)
 
 
-def term():
-    return boolean_not() | boolean_value() | boolean_group()
+def term(term_function, boolean_function):
+    return (boolean_not(term_function) | boolean_value()
+            | boolean_group(boolean_function))
 
 
 def boolean_value():
@@ -45,13 +84,14 @@ def boolean_value():
             | variable ^ (lambda x: ast.VariableExpression(x)))
 
 
-def boolean_not():
-    return (operator('-') + cmb.Lazy(term)
+def boolean_not(term_function):
+    return (operator('-') + cmb.Lazy(term_function)
             ^ (lambda parsed: ast.NotExpression(parsed[1])))
 
 
-def boolean_group():
-    return operator('(') + cmb.Lazy(boolean) + operator(')') ^ ungroup
+def boolean_group(boolean_function):
+    return (operator('(') + cmb.Lazy(boolean_function) + operator(')')
+            ^ ungroup)
 
 
 def operator(op):
@@ -69,6 +109,7 @@ def any_operator(operators):
     return parser
 
 
+memo_table = cmb.MemoTable(enabled=True)
 constant = cmb.Tag(blex.CONSTANT) ^ (lambda x: int(x))
 variable = cmb.Tag(blex.VARIABLE)
 
@@ -89,3 +130,76 @@ precedence_levels = [
     [blex.OR, blex.NOR],
     [blex.XOR, blex.IMPLY, blex.EQ],
 ]
+
+
+grammar = parser()
+packrat_grammar = parser(memo_table)
+
+
+class PrattParser(object):
+    """
+    Table-driven precedence climbing over operator_nodes and
+    precedence_levels, builds the same trees as the combinator grammar.
+
+    """
+    binding_powers = {
+        operator: len(precedence_levels) - level
+        for level, operators in enumerate(precedence_levels)
+        for operator in operators
+    }
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.position = 0
+
+    def __repr__(self):
+        return f'PrattParser: {self.position}, {self.tokens}'
+
+    def parse(self):
+        tree = self._expression(0)
+        if tree is None or self.position != len(self.tokens):
+            raise ValueError(f'Can not parse tokens: {self.tokens}')
+        return tree
+
+    def _expression(self, min_power):
+        left = self._term()
+        while left is not None:
+            power = self._binding_power()
+            if power is None or power < min_power:
+                break
+            operator_term = self.tokens[self.position][0]
+            self.position += 1
+            right = self._expression(power + 1)
+            if right is None:
+                return None
+            left = operator_nodes[operator_term](left, right)
+        return left
+
+    def _binding_power(self):
+        if self.position >= len(self.tokens):
+            return None
+        term, tag = self.tokens[self.position]
+        if tag is not blex.OPERATOR:
+            return None
+        return self.binding_powers.get(term)
+
+    def _term(self):
+        if self.position >= len(self.tokens):
+            return None
+        term, tag = self.tokens[self.position]
+        self.position += 1
+        if tag is blex.CONSTANT:
+            return ast.ConstantExpression(int(term))
+        if tag is blex.VARIABLE:
+            return ast.VariableExpression(term)
+        if term == blex.NOT:
+            operand = self._term()
+            return ast.NotExpression(operand) if operand else None
+        if term == '(':
+            tree = self._expression(0)
+            if (tree is None or self.position >= len(self.tokens)
+                    or self.tokens[self.position][0] != ')'):
+                return None
+            self.position += 1
+            return tree
+        return None
@@ -1,23 +1,144 @@
+import time
+import random
 import functools
-from copy import deepcopy
+import itertools
 from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from collections.abc import Sequence
 
 import boolean_ast as ast
+import boolean_lexer as blex
+import result_cache
+import sat
+import simplify
+from bdd import BDD
+from boolean_parser import parse
+from bit_vectors import BitVectors, NumpyVectors, np
+from cover import CoverTimeout, check_deadline, select_cover
+from espresso import Espresso
+from truth_table import TruthTable
 
 
 class ConstantError(Exception):
     pass
 
 
+class TruthTableRows(Sequence):
+    """Row-of-dicts view over packed truth table columns."""
+    def __init__(self, variables, function_name, vectors, vector):
+        self.variables = variables
+        self.F = function_name
+        self.vectors = vectors
+        self.vector = vector
+
+    def __repr__(self):
+        return f'TruthTableRows: {self.variables}, {self.F}'
+
+    def __len__(self):
+        return self.vectors.rows
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('Truth table row index out of range.')
+        row = OrderedDict(zip(self.variables,
+                              self.vectors.row_values(index)))
+        row[self.F] = self.vectors.bit(self.vector, index)
+        return row
+
+
 class BooleanCalculator(object):
-    def __init__(self, function):
+    parallel_threshold = 16
+
+    def __init__(self, function, use_numpy=False, workers=None):
+        """
+        If workers count is given, truth tables of functions with at least
+        parallel_threshold variables are evaluated in worker processes.
+
+        """
         self.function = function
         self.F = str(self.function)
+        self.vectors_type = NumpyVectors if use_numpy else BitVectors
+        self.workers = workers
+        self._reduced_function = None
+
+    @property
+    def reduced_function(self):
+        """
+        Returns function simplified and without dummy variables, truth
+        tables and normal forms are built over it.
+
+        """
+        if self._reduced_function is None:
+            self._reduced_function = simplify.reduced(self.function)
+        return self._reduced_function
+
+    def calculate(self, variable_values):
+        """Returns function value for mapping of variables to 0 or 1."""
+        variables = self._sorted_variables(self.function)
+        try:
+            values = [variable_values[v] for v in variables]
+        except KeyError:
+            raise ValueError('No such variable value in given variables.')
+        return compiled(self.function)(*values)
 
     def function_is_constant(self):
-        table = self._truth_table(self.function)
-        return (all([row[self.F] == 1 for row in table])
-                or all([row[self.F] == 0 for row in table]))
+        """Returns True if there are no values making function 1 or 0."""
+        return (self.satisfying_assignment(1) is None
+                or self.satisfying_assignment(0) is None)
+
+    def is_satisfiable(self):
+        return self.satisfying_assignment() is not None
+
+    def is_tautology(self):
+        return self.satisfying_assignment(0) is None
+
+    def satisfying_assignment(self, value=1):
+        """
+        Returns values of variables making function equal to value or
+        None, found by SAT solver without building truth table.
+
+        """
+        values = self._assignment(value)
+        if values is None:
+            return None
+        return OrderedDict(zip(self._sorted_variables(self.function), values))
+
+    def equivalent(self, other, samples=4096):
+        """
+        Checks if function is equal to function of other calculator.
+        Functions are first simulated on samples random assignments at
+        once as bit vectors, then, if no difference is found, their
+        exclusive disjunction is proven unsatisfiable by SAT solver.
+
+        Returns:
+            True and None if functions are equivalent, otherwise False
+            and values of variables of both functions they differ on.
+
+        """
+        variables = sorted(self.function.variables | other.function.variables)
+        columns = {v: random.getrandbits(samples) for v in variables}
+        ones = (1 << samples) - 1
+        outputs = [compiled(f)(*[columns[v] for v in sorted(f.variables)],
+                               _ones=ones)
+                   for f in (self.function, other.function)]
+        difference = outputs[0] ^ outputs[1]
+        if difference:
+            row = (difference & -difference).bit_length() - 1
+            values = [(columns[v] >> row) & 1 for v in variables]
+        else:
+            values = sat.find_assignment(
+                ast.XorExpression(self.function, other.function))
+        if values is None:
+            return True, None
+        return False, OrderedDict(zip(variables, values))
+
+    def satisfying_count(self):
+        bdd, root = self._bdd(self.function)
+        return bdd.satisfy_count(root)
 
     def build_truth_table(self):
         """
@@ -28,63 +149,270 @@ class BooleanCalculator(object):
             if function always takes one value.
 
         """
-        if self.function_is_constant():
-            raise ConstantError(
-                f'{self.F} is constant.',
-                self._truth_table(self.function)[0][self.F])
+        self._check_not_constant()
+        return self._truth_table(self.reduced_function)
 
-        # Deepcopy because using lru_cache.
-        return deepcopy(self._truth_table(self.function))
+    @classmethod
+    def from_truth_table(cls, table, use_numpy=False, samples=4096):
+        """
+        Returns calculator of function named in table, its truth table
+        is taken from the table and not evaluated again. The parsed
+        function is checked by key of table and by its values on samples
+        rows, so a table of other function is never cached.
+
+        Raises:
+            ValueError: An error occurred parsing function name or if
+            it is not the function of the table.
+
+        """
+        calculator = cls(parse(blex.lex(table.function_name)), use_numpy)
+        function = calculator.reduced_function
+        if calculator._sorted_variables(function) != table.variables:
+            raise ValueError('Variables of table and function differ.')
+        if (table.key is not None
+                and table.key != result_cache.canonical_key(function)):
+            raise ValueError('Key of table and function differ.')
+        if not cls._matches_rows(function, table, samples):
+            raise ValueError('Values of table and function differ.')
+        vectors = calculator.vectors_type(len(table.variables))
+        if isinstance(vectors, NumpyVectors):
+            vector = np.frombuffer(table.data, dtype=np.uint8)
+        else:
+            vector = table.to_integer()
+        key = (result_cache.canonical_key(function), 'truth vector',
+               calculator.vectors_type.__name__)
+        result_cache.cache.put(key, (vectors, vector))
+        return calculator
+
+    def to_truth_table(self):
+        """Returns truth table in compact binary form."""
+        function = self.reduced_function
+        return TruthTable.from_integer(self._sorted_variables(function),
+                                       self.F, self._truth_integer(),
+                                       result_cache.canonical_key(function))
+
+    def truth_table_header(self):
+        return self._sorted_variables(self.reduced_function) + [self.F]
+
+    def iter_truth_table(self, block_size=None):
+        """
+        Returns iterator over rows of truth table built lazily.
+        Rows are OrderedDicts like in build_truth_table or, if block_size
+        is given, lists of block_size rows (rounded down to a power of
+        two) as tuples of values in order of truth_table_header.
 
+        Raises:
+            ConstantError: An error occurred building truth table
+            if function always takes one value.
+
+        """
+        self._check_not_constant()
+        blocks = self._truth_table_blocks(block_size or 4096)
+        if block_size is not None:
+            return blocks
+        header = self.truth_table_header()
+        return (OrderedDict(zip(header, row))
+                for block in blocks for row in block)
+
+    @result_cache.cached('fcnf')
     def cast_to_fcnf(self):
         return self._cnf(self._false_vectors())
 
+    @result_cache.cached('fdnf')
     def cast_to_fdnf(self):
         return self._dnf(self._true_vectors())
 
+    @result_cache.cached('zhegalkin')
     def cast_to_zhegalkin(self):
-        triangle_table = self._build_triangle_table()
-        self._fill_triangle_table(triangle_table)
-        terms = self._zhegalkin_xored(triangle_table[:2])
+        """
+        Returns Zhegalkin polynomial, its coefficients are computed by
+        fast Möbius transform of the output vector of truth table.
+
+        """
+        self._check_not_constant()
+        variables = self._sorted_variables(self.reduced_function)
+        vectors = BitVectors(len(variables))
+        coefficients = vectors.mobius(self._truth_integer())
+        terms = [self._monomial(row, variables)
+                 for row in vectors.true_rows(coefficients)]
         return self._xor_all(terms)
 
-    def minimize(self):
+    def minimize(self, method='qmc', time_budget=5.0):
         """
-        Minimizes function using Quine–McCluskey algorithm.
+        Minimizes function using Quine–McCluskey algorithm or Espresso
+        heuristic if method is 'espresso'.
         If function takes a value of 0 or 1 then returns it.
 
         """
-        try:
-            vectors = self._true_vectors()
-        except ConstantError as exc:
-            return exc.args[-1]
-
-        vectors.sort(key=lambda x: list(x.values()).count(1))
-        result_vectors = []
-        while vectors:
-            vectors, not_glued = self._glue_vectors(vectors)
-            result_vectors.extend(not_glued)
-            vectors = self._deleted_sames(vectors)
-            result_vectors = self._deleted_sames(result_vectors)
-
-        for i, vector in enumerate(result_vectors):
-            result_vectors[i] = {var: vector[var] for var in vector
-                                 if vector[var] != '-'}
-        return self._dnf(result_vectors)
-
-    @functools.lru_cache()
+        return self.minimize_cover(method, time_budget)[0]
+
+    @result_cache.cached('minimized')
+    def minimize_cover(self, method='qmc', time_budget=5.0):
+        """
+        Minimizes function selecting prime implicants cover after
+        Quine–McCluskey algorithm or by Espresso heuristic.
+
+        Returns:
+            Minimized function and True if it is proven minimal or False
+            if Espresso was used or Quine–McCluskey ran out of
+            time_budget seconds. Then Espresso result is used if prime
+            implicants were not found in time and the best cover found
+            otherwise.
+
+        """
+        if method not in ('qmc', 'espresso'):
+            raise ValueError(f'Unknown minimization method: {method}')
+        variables = self._sorted_variables(self.reduced_function)
+        if method == 'espresso':
+            try:
+                self._check_not_constant()
+            except ConstantError as exc:
+                return exc.args[-1], True
+            espresso = Espresso(self._truth_integer(), len(variables))
+            cover, proven = espresso.minimize(), False
+        else:
+            try:
+                rows = self._true_rows()
+            except ConstantError as exc:
+                return exc.args[-1], True
+            deadline = (None if time_budget is None
+                        else time.monotonic() + time_budget)
+            try:
+                primes = self._prime_implicants(rows, len(variables),
+                                                deadline)
+                if deadline is not None:
+                    time_budget = max(deadline - time.monotonic(), 0)
+                cover, proven = select_cover(primes, rows, len(variables),
+                                             time_budget)
+            except CoverTimeout:
+                espresso = Espresso(self._truth_integer(), len(variables))
+                cover, proven = espresso.minimize(), False
+        result_vectors = [self._implicant_vector(value, mask, variables)
+                          for value, mask in cover]
+        return self._dnf(result_vectors), proven
+
+    def _check_not_constant(self):
+        if self.function_is_constant():
+            raise ConstantError(f'{self.F} is constant.',
+                                int(self.is_satisfiable()))
+
+    @result_cache.cached('assignment')
+    def _assignment(self, value):
+        values = sat.find_assignment(self.function, value)
+        return None if values is None else tuple(values)
+
     def _truth_table(self, function):
-        """Returns truth table using LRU cache."""
+        """Returns truth table view over the packed output vector."""
+        vectors, vector = self._truth_vector(function)
+        variables = self._sorted_variables(function)
+        return TruthTableRows(variables, self.F, vectors, vector)
+
+    def _truth_vector(self, function):
+        """
+        Returns packed output column of truth table using result cache.
+        Every variable column is a bitmask over all rows, so the function
+        is evaluated by one call of its compiled form for the whole table.
+
+        """
+        key = (result_cache.canonical_key(function), 'truth vector',
+               self.vectors_type.__name__)
+        result = result_cache.cache.get(key)
+        if result is result_cache.ResultCache.missing:
+            result = self._evaluate_truth_vector(function)
+            result_cache.cache.put(key, result)
+        return result
+
+    def _evaluate_truth_vector(self, function):
+        """Returns variable vectors and evaluated output vector."""
+        variables = self._sorted_variables(function)
+        vectors = self.vectors_type(len(variables))
+        if (self.workers and self.workers > 1
+                and len(variables) >= self.parallel_threshold):
+            vector = self._sharded_truth_vector(function, vectors)
+        else:
+            vector = compiled(function)(*vectors.variables(),
+                                        _ones=vectors.ones)
+        return vectors, vector
+
+    def _sharded_truth_vector(self, function, vectors):
+        """
+        Evaluates truth table in contiguous ranges of rows, one range per
+        worker process. Ranges are aligned to powers of two, so the first
+        variables are constant within a range and workers only need the
+        source of compiled function.
+
+        """
+        high_count = min((self.workers - 1).bit_length(), vectors.count - 3)
+        source = compiled(function).source
+        shards = [(source, vectors.count, high_count, shard)
+                  for shard in range(2 ** high_count)]
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            parts = list(executor.map(_evaluate_shard, shards))
+        packed = b''.join(parts)
+        if isinstance(vectors, NumpyVectors):
+            return np.frombuffer(packed, dtype=np.uint8).copy()
+        return int.from_bytes(packed, 'little')
+
+    def _truth_integer(self):
+        """Returns output vector of truth table as integer."""
+        vectors, vector = self._truth_vector(self.reduced_function)
+        if isinstance(vectors, NumpyVectors):
+            return int.from_bytes(vector.tobytes(), 'little')
+        return vector
+
+    def _bdd(self, function):
+        """
+        Returns BDD in sorted variables order and its root node using
+        result cache.
+
+        """
+        key = result_cache.canonical_key(function), 'bdd'
+        result = result_cache.cache.get(key, persistent=False)
+        if result is result_cache.ResultCache.missing:
+            bdd = BDD(self._sorted_variables(function))
+            result = bdd, bdd.build(function)
+            result_cache.cache.put(key, result, persistent=False)
+        return result
+
+    def _truth_bytes(self):
+        """Returns output vector of truth table as little-endian bytes."""
+        vectors, vector = self._truth_vector(self.reduced_function)
+        if isinstance(vectors, NumpyVectors):
+            return vector.tobytes()
+        return vector.to_bytes((vectors.rows + 7) // 8, 'little')
+
+    @staticmethod
+    def _matches_rows(function, table, samples):
+        """
+        Checks function on all rows of table or on samples random ones,
+        evaluated at once as bit vectors.
+
+        """
+        if table.rows <= samples:
+            rows = range(table.rows)
+        else:
+            rows = [random.randrange(table.rows) for _ in range(samples)]
+        count = len(table.variables)
+        columns = [0] * count
+        expected = 0
+        for bit, row in enumerate(rows):
+            for i in range(count):
+                if row >> (count - 1 - i) & 1:
+                    columns[i] |= 1 << bit
+            expected |= table.value(row) << bit
+        ones = (1 << len(rows)) - 1
+        return compiled(function)(*columns, _ones=ones) == expected
+
+    @staticmethod
+    def _sorted_variables(function):
         variables = list(function.variables)
         variables.sort()
-        variable_values_list = [OrderedDict(zip(variables, subset))
-                                for subset in _subsets(len(variables))]
+        return variables
 
-        table = []
-        for variable_values in variable_values_list:
-            variable_values[self.F] = function.calculate(variable_values)
-            table.append(variable_values)
-        return table
+    def _vectors_of_node(self, node):
+        bdd, _ = self._bdd(self.reduced_function)
+        return [OrderedDict(zip(bdd.variables, values))
+                for values in bdd.satisfy_all(node)]
 
     def _dnf(self, vectors):
         terms = self._grouped_to_terms(
@@ -112,39 +440,30 @@ class BooleanCalculator(object):
     def _xor_all(terms):
         return functools.reduce(lambda a, b: a ^ b, terms)
 
-    def _build_triangle_table(self):
-        truth_table = self.build_truth_table()
-        help_table = [[0 for _ in range(i)]
-                      for i in range(len(truth_table), 0, -1)]
-        for i in range(len(help_table)):
-            help_table[i][0] = truth_table[i][self.F]
-        terms = self._conjunction_terms(truth_table[1:])
-        terms.insert(0, ast.ConstantExpression(1))
-        help_table.insert(0, terms)
-        return help_table
-
-    @staticmethod
-    def _fill_triangle_table(table):
-        for j in range(1, len(table[1:])):
-            for i in range(1, len(table[j])):
-                table[i][j] = (table[i][j - 1] ^ table[i + 1][j - 1])
+    def _truth_table_blocks(self, block_size):
+        """Yields blocks of rows sharing values of first variables."""
+        count = len(self.reduced_function.variables)
+        low_count = min(count, max(block_size.bit_length() - 1, 0))
+        low_subsets = list(_subsets(low_count))
+        packed = self._truth_bytes()
+        mask = (1 << len(low_subsets)) - 1
+        for start, high_subset in enumerate(_subsets(count - low_count)):
+            start <<= low_count
+            end = (start + len(low_subsets) + 7) // 8
+            outputs = int.from_bytes(packed[start // 8:end], 'little')
+            outputs = (outputs >> (start % 8)) & mask
+            outputs = format(outputs, f'0{len(low_subsets)}b')[::-1]
+            yield [high_subset + low_subset + (int(output),)
+                   for low_subset, output in zip(low_subsets, outputs)]
 
     @staticmethod
-    def _zhegalkin_xored(terms_table):
-        terms = []
-        for term, should_be in zip(*terms_table):
-            if should_be:
-                terms.append(term)
-        return terms
-
-    def _conjunction_terms(self, vectors):
-        terms = self._grouped_to_terms(
-            vectors, lambda x: not x,
-            lambda a: None,
-            lambda a, b: a & b
-        )
-
-        return terms
+    def _monomial(row, variables):
+        nodes = [ast.VariableExpression(variable)
+                 for i, variable in enumerate(variables)
+                 if row >> (len(variables) - 1 - i) & 1]
+        if not nodes:
+            return ast.ConstantExpression(1)
+        return functools.reduce(lambda a, b: a & b, nodes)
 
     def _grouped_to_terms(self, vectors, should_modify,
                           modify, group_operation):
@@ -162,69 +481,93 @@ class BooleanCalculator(object):
             terms.append(term)
         return terms
 
-    def _glue_vectors(self, vectors):
-        vector_groups = self._grouped_by_ones_count(vectors)
-        new_vectors = []
-        glued_vectors = []
-        for i in range(0, len(vector_groups) - 1):
-            for vector1 in vector_groups[i]:
-                for vector2 in vector_groups[i + 1]:
-                    new_vector = self._glued(vector1, vector2)
-                    if new_vector is not None:
-                        new_vectors.append(new_vector)
-                        glued_vectors.extend([vector1, vector2])
-
-        not_glued = [v for v in vectors if v not in glued_vectors]
-        return new_vectors, not_glued
+    @staticmethod
+    def _prime_implicants(rows, count, deadline=None):
+        """
+        Returns prime implicants of rows as (value, mask) pairs, where
+        mask has bits of glued variables and value has them cleared.
+        Implicants are grouped by mask, two of them glue if their values
+        differ in one bit, so gluing by a bit is a set intersection.
+
+        Raises:
+            CoverTimeout: An error occurred if deadline has passed.
+
+        """
+        single_bits = [1 << i for i in range(count)]
+        implicants = {0: set(rows)}
+        primes = []
+        while implicants:
+            new_implicants = {}
+            level_primes = []
+            for mask, values in implicants.items():
+                glued = set()
+                for bit in single_bits:
+                    if mask & bit:
+                        continue
+                    check_deadline(deadline)
+                    zeros = {v for v in values if not v & bit}
+                    ones = {v ^ bit for v in values if v & bit}
+                    pairs = zeros & ones
+                    if pairs:
+                        glued |= pairs
+                        glued.update(v | bit for v in pairs)
+                        new_implicants.setdefault(
+                            mask | bit, set()).update(pairs)
+                level_primes.extend((v, mask) for v in values - glued)
+
+            primes.extend(sorted(level_primes))
+            implicants = new_implicants
+        return primes
 
     @staticmethod
-    def _glued(vector1, vector2):
-        new_vector = OrderedDict()
-        difference_count = 0
-        for variable, _ in zip(vector1, vector2):
-            if vector1[variable] != vector2[variable]:
-                new_vector[variable] = '-'
-                difference_count += 1
-            else:
-                new_vector[variable] = vector1[variable]
-        if difference_count == 1:
-            return new_vector
-        return None
+    def _implicant_vector(value, mask, variables):
+        vector = OrderedDict()
+        for i, variable in enumerate(variables):
+            bit = 1 << (len(variables) - 1 - i)
+            if not mask & bit:
+                vector[variable] = int(bool(value & bit))
+        return vector
+
+    def _true_rows(self):
+        self._check_not_constant()
+        bdd, root = self._bdd(self.reduced_function)
+        rows = []
+        for values in bdd.satisfy_all(root):
+            row = 0
+            for value in values:
+                row = (row << 1) | value
+            rows.append(row)
+        return rows
 
     def _true_vectors(self):
-        return [vector for vector in self.build_truth_table()
-                if vector.pop(self.F)]
+        self._check_not_constant()
+        _, root = self._bdd(self.reduced_function)
+        return self._vectors_of_node(root)
 
     def _false_vectors(self):
-        return [vector for vector in self.build_truth_table()
-                if not vector.pop(self.F)]
+        self._check_not_constant()
+        bdd, root = self._bdd(self.reduced_function)
+        return self._vectors_of_node(bdd.negate(root))
 
-    @staticmethod
-    def _deleted_sames(iterable):
-        new = []
-        for i in iterable:
-            if i not in new:
-                new.append(i)
-        return new
 
-    @staticmethod
-    def _grouped_by_ones_count(vectors):
-        groups = []
-        group = []
-        count = 0
-        for vector in vectors:
-            if list(vector.values()).count(1) == count:
-                group.append(vector)
-            else:
-                count += 1
-                groups.append(group)
-                group = [vector]
-        groups.append(group)
-        return groups
+@functools.lru_cache(maxsize=256)
+def compiled(function):
+    """Returns compiled function of sorted variables using LRU cache."""
+    return function.compile()
+
+
+def _evaluate_shard(arguments):
+    """Returns packed little-endian bits of one range of truth table."""
+    source, count, high_count, shard = arguments
+    namespace = {}
+    exec(compile(source, '<boolean_ast>', 'exec'), namespace)
+    low_vectors = BitVectors(count - high_count)
+    high_values = [low_vectors.ones if (shard >> i) & 1 else 0
+                   for i in reversed(range(high_count))]
+    vector = namespace['function'](*high_values, *low_vectors.variables(),
+                                   _ones=low_vectors.ones)
+    return vector.to_bytes(low_vectors.rows // 8, 'little')
 
 
 def _subsets(power):
-    for i in range(2 ** power):
-        str_subset = bin(i).lstrip('0b').rjust(power, '0')
-        subset = [int(x) for x in str_subset]
-        yield subset
+    return itertools.product((0, 1), repeat=power)
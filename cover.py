@@ -0,0 +1,224 @@
+import time
+
+
+class CoverTimeout(Exception):
+    pass
+
+
+def select_cover(implicants, rows, count, time_budget=None):
+    """
+    Selects implicants covering all rows with minimal cost.
+
+    Implicants are (value, mask) pairs over count variables. Cost of an
+    implicant is one term plus its literals, a term weighs more than all
+    literals of a term together. Essential implicants are taken first,
+    then dominated rows and implicants are removed and the cyclic rest
+    is solved by branch and bound.
+
+    Returns:
+        Chosen implicants and True if the cover is proven minimal or
+        False if time budget ran out and the best found cover or, if it
+        ran out during reduction, greedy cover is used.
+
+    Raises:
+        CoverTimeout: An error occurred if time budget ran out while
+        covering table was built.
+
+    """
+    deadline = None if time_budget is None else time.monotonic() + time_budget
+    table = CoverTable(implicants, rows, count, deadline)
+    search = BranchAndBound(table, deadline)
+    try:
+        chosen, candidates, uncovered = table.reduced(deadline)
+    except CoverTimeout:
+        chosen = search._greedy(set(range(len(implicants))), table.all_rows)
+        return [table.implicants[i] for i in sorted(chosen)], False
+    try:
+        search.solve(candidates, uncovered)
+        proven = True
+    except CoverTimeout:
+        proven = False
+    chosen.extend(search.best)
+    return [table.implicants[i] for i in sorted(chosen)], proven
+
+
+def check_deadline(deadline):
+    """Raises CoverTimeout if deadline of time.monotonic() has passed."""
+    if deadline is not None and time.monotonic() > deadline:
+        raise CoverTimeout()
+
+
+class CoverTable(object):
+    """
+    Covering table, rows are numbered in given order and sets of rows
+    are integers with bit k for row k.
+
+    """
+    def __init__(self, implicants, rows, count, deadline=None):
+        self.implicants = list(implicants)
+        self.costs = [(count + 1) + count - _ones_count(mask)
+                      for _, mask in self.implicants]
+        row_numbers = {row: k for k, row in enumerate(rows)}
+        self.row_implicants = [[] for _ in row_numbers]
+        self.covered_rows = []
+        for i, (value, mask) in enumerate(self.implicants):
+            check_deadline(deadline)
+            covered = 0
+            for row in _minterms(value, mask):
+                k = row_numbers[row]
+                covered |= 1 << k
+                self.row_implicants[k].append(i)
+            self.covered_rows.append(covered)
+        self.all_rows = (1 << len(row_numbers)) - 1
+
+    def __repr__(self):
+        return (f'CoverTable: {len(self.implicants)} implicants, '
+                f'{len(self.row_implicants)} rows')
+
+    def candidates_of(self, k, candidates):
+        return [i for i in self.row_implicants[k] if i in candidates]
+
+    def reduced(self, deadline=None):
+        """
+        Takes essential implicants and removes dominated rows and
+        implicants until nothing changes.
+
+        Raises:
+            CoverTimeout: An error occurred if deadline has passed.
+
+        Returns:
+            Chosen implicants, remaining candidates and rows to cover.
+
+        """
+        chosen = []
+        candidates = set(range(len(self.implicants)))
+        uncovered = self.all_rows
+        changed = True
+        while changed and uncovered:
+            check_deadline(deadline)
+            changed = False
+            row_sets = {k: frozenset(self.candidates_of(k, candidates))
+                        for k in _indexes(uncovered)}
+
+            for k, row_set in row_sets.items():
+                if len(row_set) == 1 and uncovered >> k & 1:
+                    i, = row_set
+                    chosen.append(i)
+                    uncovered &= ~self.covered_rows[i]
+                    changed = True
+            if changed:
+                candidates = {i for i in candidates if i not in chosen
+                              and self.covered_rows[i] & uncovered}
+                continue
+
+            dominated = 0
+            ordered = sorted(row_sets, key=lambda r: len(row_sets[r]))
+            for n, k in enumerate(ordered):
+                check_deadline(deadline)
+                if dominated >> k & 1:
+                    continue
+                for other in ordered[n + 1:]:
+                    if (not dominated >> other & 1
+                            and row_sets[k] <= row_sets[other]):
+                        dominated |= 1 << other
+            if dominated:
+                uncovered &= ~dominated
+                changed = True
+
+            for i in sorted(candidates):
+                check_deadline(deadline)
+                if self._is_dominated(i, candidates, uncovered):
+                    candidates.discard(i)
+                    changed = True
+        return chosen, candidates, uncovered
+
+    def _is_dominated(self, i, candidates, uncovered):
+        rows = self.covered_rows[i] & uncovered
+        if not rows:
+            return True
+        for j in candidates:
+            if j == i or self.costs[j] > self.costs[i]:
+                continue
+            other_rows = self.covered_rows[j] & uncovered
+            if rows & ~other_rows:
+                continue
+            if (self.costs[j] < self.costs[i] or other_rows != rows
+                    or j < i):
+                return True
+        return False
+
+
+class BranchAndBound(object):
+    def __init__(self, table, deadline):
+        self.table = table
+        self.deadline = deadline
+        self.best = []
+        self.best_cost = 0
+
+    def __repr__(self):
+        return f'BranchAndBound: {self.best_cost}, {self.best}'
+
+    def solve(self, candidates, uncovered):
+        self.best = self._greedy(candidates, uncovered)
+        self.best_cost = sum(self.table.costs[i] for i in self.best)
+        self._search(candidates, uncovered, [], 0)
+
+    def _search(self, candidates, uncovered, chosen, cost):
+        check_deadline(self.deadline)
+        if not uncovered:
+            if cost < self.best_cost:
+                self.best, self.best_cost = list(chosen), cost
+            return
+        if cost + self._lower_bound(candidates, uncovered) >= self.best_cost:
+            return
+
+        covered_rows = self.table.covered_rows
+        branches = min((self.table.candidates_of(k, candidates)
+                        for k in _indexes(uncovered)), key=len)
+        branches.sort(key=lambda i: -_ones_count(covered_rows[i] & uncovered))
+        for i in branches:
+            chosen.append(i)
+            self._search(candidates, uncovered & ~covered_rows[i],
+                         chosen, cost + self.table.costs[i])
+            chosen.pop()
+
+    def _lower_bound(self, candidates, uncovered):
+        """Sums cheapest costs of rows which can't share an implicant."""
+        bound = 0
+        while uncovered:
+            k = (uncovered & -uncovered).bit_length() - 1
+            row_candidates = self.table.candidates_of(k, candidates)
+            bound += min(self.table.costs[i] for i in row_candidates)
+            for i in row_candidates:
+                uncovered &= ~self.table.covered_rows[i]
+        return bound
+
+    def _greedy(self, candidates, uncovered):
+        chosen = []
+        while uncovered:
+            i = max(candidates, key=lambda c: (
+                _ones_count(self.table.covered_rows[c] & uncovered)
+                / self.table.costs[c]))
+            chosen.append(i)
+            uncovered &= ~self.table.covered_rows[i]
+        return chosen
+
+
+def _minterms(value, mask):
+    submask = mask
+    while True:
+        yield value | submask
+        if not submask:
+            return
+        submask = (submask - 1) & mask
+
+
+def _indexes(number):
+    while number:
+        bit = number & -number
+        yield bit.bit_length() - 1
+        number ^= bit
+
+
+def _ones_count(number):
+    return bin(number).count('1')
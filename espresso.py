@@ -0,0 +1,146 @@
+from bit_vectors import BitVectors
+
+
+class Espresso(object):
+    """
+    Heuristic two-level minimizer modelled on Espresso.
+
+    Cubes are (value, mask) pairs like Quine–McCluskey implicants, the
+    rows covered by a cube are computed as a packed vector, so checking
+    a cube against the OFF-set is a few big integer operations.
+
+    """
+    def __init__(self, on_vector, count):
+        self.count = count
+        self.vectors = BitVectors(count)
+        self.on = on_vector
+        self.off = self.vectors.ones ^ on_vector
+        self.variables = self.vectors.variables()
+
+    def __repr__(self):
+        return f'Espresso: {self.count}'
+
+    def minimize(self, max_iterations=20):
+        cover = self.irredundant(self.initial_cover())
+        best = cover
+        for _ in range(max_iterations):
+            cover = self.irredundant(self.expand(self.reduce(cover)))
+            if self._cost(cover) >= self._cost(best):
+                break
+            best = cover
+        return sorted(best)
+
+    def initial_cover(self):
+        """Expands uncovered rows of ON-set one by one."""
+        cover = []
+        covered = 0
+        remaining = self.on
+        while remaining:
+            row = (remaining & -remaining).bit_length() - 1
+            cube, rows = self.expand_cube((row, 0))
+            cover.append(cube)
+            covered |= rows
+            remaining = self.on & ~covered
+        return cover
+
+    def expand(self, cover):
+        expanded = [self.expand_cube(cube)[0] for cube in cover]
+        return self._without_contained(expanded)
+
+    def expand_cube(self, cube):
+        """Raises literals of cube while it doesn't meet OFF-set."""
+        value, mask = cube
+        rows = self.cube_rows(cube)
+        for index in range(self.count):
+            bit = 1 << (self.count - 1 - index)
+            if mask & bit:
+                continue
+            expanded_rows = rows | self._mirrored(rows, bit, value & bit)
+            if not expanded_rows & self.off:
+                value &= ~bit
+                mask |= bit
+                rows = expanded_rows
+        return (value, mask), rows
+
+    def irredundant(self, cover):
+        """Removes cubes covered by other cubes, smallest cubes first."""
+        cover = sorted(cover, key=lambda c: _ones_count(c[1]))
+        rows = [self.cube_rows(cube) for cube in cover]
+        suffixes = [0] * (len(cover) + 1)
+        for i in range(len(cover) - 1, -1, -1):
+            suffixes[i] = suffixes[i + 1] | rows[i]
+
+        kept = []
+        kept_rows = 0
+        for i, cube in enumerate(cover):
+            if rows[i] & ~(kept_rows | suffixes[i + 1]):
+                kept.append(cube)
+                kept_rows |= rows[i]
+        return kept
+
+    def reduce(self, cover):
+        """Shrinks every cube to rows only it covers, largest first."""
+        cover = sorted(cover, key=lambda c: -_ones_count(c[1]))
+        rows = [self.cube_rows(cube) for cube in cover]
+        suffixes = [0] * (len(cover) + 1)
+        for i in range(len(cover) - 1, -1, -1):
+            suffixes[i] = suffixes[i + 1] | rows[i]
+
+        reduced = []
+        reduced_rows = 0
+        for i, cube in enumerate(cover):
+            essential = rows[i] & ~(reduced_rows | suffixes[i + 1])
+            if not essential:
+                continue
+            cube = self._supercube(cube, essential)
+            reduced.append(cube)
+            reduced_rows |= self.cube_rows(cube)
+        return reduced
+
+    def cube_rows(self, cube):
+        value, mask = cube
+        rows = self.vectors.ones
+        for index, variable in enumerate(self.variables):
+            bit = 1 << (self.count - 1 - index)
+            if mask & bit:
+                continue
+            rows &= variable if value & bit else self.vectors.ones ^ variable
+        return rows
+
+    def _supercube(self, cube, rows):
+        value, mask = cube
+        for index, variable in enumerate(self.variables):
+            bit = 1 << (self.count - 1 - index)
+            if not mask & bit:
+                continue
+            if not rows & ~variable:
+                value |= bit
+                mask &= ~bit
+            elif not rows & variable:
+                mask &= ~bit
+        return value, mask
+
+    @staticmethod
+    def _mirrored(rows, bit, is_set):
+        """Returns rows with the variable of bit changed to other value."""
+        shift = bit
+        return rows >> shift if is_set else rows << shift
+
+    @staticmethod
+    def _without_contained(cover):
+        cover = sorted(set(cover), key=lambda c: -_ones_count(c[1]))
+        kept = []
+        for value, mask in cover:
+            if not any(value & ~other_mask == other_value
+                       and mask & ~other_mask == 0
+                       for other_value, other_mask in kept):
+                kept.append((value, mask))
+        return kept
+
+    def _cost(self, cover):
+        literals = sum(self.count - _ones_count(mask) for _, mask in cover)
+        return len(cover), literals
+
+
+def _ones_count(number):
+    return bin(number).count('1')
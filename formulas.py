@@ -0,0 +1,39 @@
+"""
+Random formulas for benchmarks and load tests.
+
+"""
+import string
+
+import boolean_lexer as blex
+
+
+OPERATORS = [blex.AND, blex.NAND, blex.OR, blex.NOR,
+             blex.XOR, blex.IMPLY, blex.EQ]
+
+
+def random_expression(rand, count, leaves, depth):
+    """
+    Returns formula of leaves variables, every one of count first
+    variables occurs at least once, nesting is limited by depth.
+
+    """
+    variables = list(string.ascii_lowercase[:count])
+    names = variables + [rand.choice(variables)
+                         for _ in range(leaves - count)]
+    rand.shuffle(names)
+    return _subexpression(rand, names, depth)
+
+
+def _subexpression(rand, names, depth):
+    if len(names) == 1:
+        return blex.NOT * (rand.random() < 0.3) + names[0]
+    if depth <= 1:
+        operator = rand.choice(OPERATORS[:2])
+        return '(' + f' {operator} '.join(names) + ')'
+    middle = rand.randint(1, len(names) - 1)
+    expression = (f'{_subexpression(rand, names[:middle], depth - 1)} '
+                  f'{rand.choice(OPERATORS)} '
+                  f'{_subexpression(rand, names[middle:], depth - 1)}')
+    if rand.random() < 0.5:
+        expression = f'({expression})'
+    return expression
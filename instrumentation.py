@@ -0,0 +1,185 @@
+"""
+Timers and counters of the stages of calculations.
+
+Stages are measured by wrappers installed by enable() and removed by
+disable(), so instrumentation costs nothing while it is disabled.
+
+    import instrumentation
+    instrumentation.enable()
+    ...
+    print(instrumentation.report())
+
+"""
+import sys
+import json
+import time
+import functools
+
+import boolean_ast as ast
+import boolean_parser as bparser
+import calculation
+import cover
+import result_cache
+from calculation import BooleanCalculator
+from language_analysis.lexer import Lexer
+
+
+class Stage(object):
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+
+    def __repr__(self):
+        return f'Stage: {self.calls} calls, {self.seconds:.6f} s'
+
+
+stages = {}
+counters = {}
+_originals = []
+
+
+def _truth_table_rows(result):
+    vectors, _ = result
+    return {'truth table rows': vectors.rows}
+
+
+def _implicants(result):
+    return {'prime implicants found': len(result)}
+
+
+# Stage name, owner of attribute, attribute name and function returning
+# counters to add from the result of call.
+TARGETS = [
+    ('lex', Lexer, '__call__', None),
+    ('parse', bparser, 'parse', None),
+    ('calculate', BooleanCalculator, 'calculate', None),
+    ('constancy check', BooleanCalculator, 'function_is_constant', None),
+    ('build truth table', BooleanCalculator, 'build_truth_table', None),
+    ('iter truth table', BooleanCalculator, 'iter_truth_table', None),
+    ('truth table evaluation', BooleanCalculator, '_evaluate_truth_vector',
+     _truth_table_rows),
+    ('fdnf', BooleanCalculator, 'cast_to_fdnf', None),
+    ('fcnf', BooleanCalculator, 'cast_to_fcnf', None),
+    ('zhegalkin', BooleanCalculator, 'cast_to_zhegalkin', None),
+    ('minimize', BooleanCalculator, 'minimize_cover', None),
+    ('prime implicants', BooleanCalculator, '_prime_implicants',
+     _implicants),
+    ('cover selection', cover, 'select_cover', None),
+    ('equivalence', BooleanCalculator, 'equivalent', None),
+    ('stringification', ast.Expression, '__str__', None),
+]
+
+
+def enable():
+    """Installs timing wrappers, does nothing if they are installed."""
+    if _originals:
+        return
+    for name, owner, attribute, count in TARGETS:
+        original = owner.__dict__[attribute]
+        wrapper = _timed(name, original, count)
+        for namespace in _namespaces(owner, attribute, original):
+            _originals.append((namespace, attribute, original))
+            setattr(namespace, attribute, wrapper)
+
+
+def disable():
+    """Restores original functions, collected stats are kept."""
+    while _originals:
+        namespace, attribute, original = _originals.pop()
+        setattr(namespace, attribute, original)
+
+
+def is_enabled():
+    return bool(_originals)
+
+
+def reset():
+    stages.clear()
+    counters.clear()
+
+
+def report():
+    """Returns cumulative timings, call counts, counters and cache stats."""
+    return {
+        'enabled': is_enabled(),
+        'stages': {name: {'calls': stage.calls,
+                          'seconds': stage.seconds}
+                   for name, stage in stages.items()},
+        'counters': dict(counters),
+        'result cache': result_cache.cache.stats(),
+        'compiled cache': calculation.compiled.cache_info()._asdict(),
+    }
+
+
+def export(path=None):
+    """Writes report as JSON to file of path or stdout."""
+    text = json.dumps(report(), indent=2)
+    if path is None:
+        print(text)
+    else:
+        with open(path, 'w') as file:
+            file.write(text + '\n')
+
+
+def format_report():
+    """Returns report as lines of text."""
+    data = report()
+    lines = [f'# Instrumentation is {"on" if data["enabled"] else "off"}.']
+    for name, stage in data['stages'].items():
+        lines.append(f'{name:<24}{stage["calls"]:>8} calls'
+                     f'{stage["seconds"]:>12.6f} s')
+    for name, value in data['counters'].items():
+        lines.append(f'{name:<24}{value:>8}')
+    cache = data['result cache']
+    lines.append(f'{"result cache":<24}{cache["hits"]:>8} hits'
+                 f'{cache["misses"]:>8} misses'
+                 f'{cache["hit_rate"]:>8.1%}'
+                 f'{cache["store_hits"]:>8} store hits')
+    compiled = data['compiled cache']
+    lines.append(f'{"compiled cache":<24}{compiled["hits"]:>8} hits'
+                 f'{compiled["misses"]:>8} misses')
+    return lines
+
+
+def _timed(name, original, count):
+    function = original
+    if isinstance(original, (staticmethod, classmethod)):
+        function = original.__func__
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            result = function(*args, **kwargs)
+        finally:
+            stage = stages.get(name)
+            if stage is None:
+                stage = stages[name] = Stage()
+            stage.calls += 1
+            stage.seconds += time.perf_counter() - start
+        if count is not None:
+            for counter, value in count(result).items():
+                counters[counter] = counters.get(counter, 0) + value
+        return result
+
+    if isinstance(original, staticmethod):
+        return staticmethod(wrapper)
+    if isinstance(original, classmethod):
+        return classmethod(wrapper)
+    return wrapper
+
+
+def _namespaces(owner, attribute, original):
+    """
+    Returns owner and loaded modules which imported the function by name,
+    so calls through them are measured too.
+
+    """
+    namespaces = [owner]
+    if isinstance(owner, type):
+        return namespaces
+    for module in list(sys.modules.values()):
+        if (module is not owner
+                and getattr(module, attribute, None) is original):
+            namespaces.append(module)
+    return namespaces
@@ -1,12 +1,20 @@
+import re
 import sys
 import cmd
+import sqlite3
 
 import boolean_lexer as blex
+import instrumentation
+import persistent_store
+import result_cache
 
 from boolean_parser import parse
 from calculation import BooleanCalculator, ConstantError
 
 
+ESPRESSO_OPTION = '--espresso'
+
+
 class CalculatorInterpreter(cmd.Cmd):
     def __init__(self):
         cmd.Cmd.__init__(self)
@@ -56,12 +64,14 @@ class CalculatorInterpreter(cmd.Cmd):
         else:
             print('! No loaded function.')
 
-    def do_table(self, expression):
-        """# Builds truth table for function."""
+    def do_table(self, argument):
+        """# Builds truth table for function, "table <function> > <file>"
+        # writes it to the file."""
+        expression, path = split_output(argument)
         self._handle_optional_command(
             expression,
-            lambda: print_table(get_calculator(expression).build_truth_table()),
-            lambda: print_table(self.calculator.build_truth_table()))
+            lambda: write_table(get_calculator(expression), path),
+            lambda: write_table(self.calculator, path))
 
     def do_fdnf(self, expression):
         """# Casts function to FCNF (full conjunctive normal form)."""
@@ -85,13 +95,88 @@ class CalculatorInterpreter(cmd.Cmd):
             lambda: print(self.calculator.cast_to_zhegalkin()))
 
     def do_min(self, expression):
-        """# Minimizes function using Quine–McCluskey algorithm."""
+        """# Minimizes function by Quine–McCluskey or --espresso heuristic."""
+        method = 'qmc'
+        if expression.startswith(ESPRESSO_OPTION):
+            method = 'espresso'
+            expression = expression[len(ESPRESSO_OPTION):].strip()
         self._handle_optional_command(
             expression,
-            lambda: print(get_calculator(expression).minimize()),
-            lambda: print(self.calculator.minimize())
+            lambda: print_cover(
+                get_calculator(expression).minimize_cover(method)),
+            lambda: print_cover(self.calculator.minimize_cover(method))
         )
 
+    def do_sat(self, expression):
+        """# Finds values of variables making function 1."""
+        self._handle_optional_command(
+            expression,
+            lambda: print_satisfiability(get_calculator(expression)),
+            lambda: print_satisfiability(self.calculator))
+
+    def do_taut(self, expression):
+        """# Checks if function is 1 for all values of variables."""
+        self._handle_optional_command(
+            expression,
+            lambda: print_tautology(get_calculator(expression)),
+            lambda: print_tautology(self.calculator))
+
+    def do_equiv(self, argument):
+        """# Checks if functions are equal, "equiv <function> ; <function>"."""
+        first, separator, second = argument.partition(';')
+        if not separator:
+            print('! Use "equiv <function> ; <function>".')
+            return
+        try:
+            calculators = get_calculator(first), get_calculator(second)
+        except ValueError:
+            print('! Expression is not correct')
+        else:
+            print_equivalence(*calculators)
+
+    def do_stats(self, argument):
+        """# Shows timings of calculation stages, "stats on", "stats off",
+        # "stats reset", "stats json" or "stats > <file>" writes JSON."""
+        command, path = split_output(argument)
+        if command == 'on':
+            instrumentation.enable()
+            print('# Instrumentation is on.')
+        elif command == 'off':
+            instrumentation.disable()
+            print('# Instrumentation is off.')
+        elif command == 'reset':
+            instrumentation.reset()
+            print('# Stats are reset.')
+        elif command == 'json' or (not command and path):
+            try:
+                instrumentation.export(path)
+            except OSError:
+                print(f'! Can not write to {path}')
+        elif not command:
+            print('\n'.join(instrumentation.format_report()))
+        else:
+            print('! Unknown stats option.')
+
+    def do_store(self, argument):
+        """# Keeps results in file between sessions, "store <file>" opens
+        # it, "store off" closes it and "store" shows its stats."""
+        store = result_cache.cache.store
+        if argument == 'off':
+            persistent_store.close_store()
+            print('# Store is closed.')
+        elif argument:
+            try:
+                store = persistent_store.open_store(argument)
+            except sqlite3.Error:
+                print(f'! Can not open store {argument}')
+            else:
+                print(f'# Results are stored in {store.path}.')
+        elif store is None:
+            print('! No opened store.')
+        else:
+            print(''.join(f'{name:<12}{value}\n'
+                          for name, value in store.stats().items()), end='')
+
     def do_close(self, empty):
         """# Closes Logy."""
         sys.exit()
@@ -115,17 +200,79 @@ class CalculatorInterpreter(cmd.Cmd):
 
 
 def get_calculator(expression):
-    tokens = blex.lex(expression)
-    function = parse(tokens)
+    """
+    Returns calculator of expression parsed or found in result cache.
+    Parsed trees are kept in memory only, they are keyed by text.
+
+    """
+    key = ('parsed', expression.strip())
+    function = result_cache.cache.get(key, persistent=False)
+    if function is result_cache.ResultCache.missing:
+        function = parse(blex.lex(expression))
+        result_cache.cache.put(key, function, persistent=False)
     return BooleanCalculator(function)
 
 
-def print_table(table):
-    for variable in table[0]:
-        print(variable, end='\t')
-    print()
-    for row in table:
-        for variable in row:
-            separator = ' ' * (len(variable) // 2)
-            print(separator, row[variable], end='\t', sep='')
-        print()
+def split_output(argument):
+    """Splits "<expression> > <path>" argument, > can't start -> or <->."""
+    match = re.search(r'(?:^|\s)>\s*(\S.*?)\s*$', argument)
+    if match is None:
+        return argument, None
+    return argument[:match.start()].strip(), match.group(1)
+
+
+def write_table(calculator, path=None, block_size=4096):
+    """Writes truth table by blocks of rows to stdout or file of path."""
+    blocks = calculator.iter_truth_table(block_size)
+    header = calculator.truth_table_header()
+    row_format = ''.join(' ' * (len(column) // 2) + '{}\t'
+                         for column in header) + '\n'
+    try:
+        file = open(path, 'w', buffering=1 << 20) if path else sys.stdout
+    except OSError:
+        print(f'! Can not write to {path}')
+        return
+    try:
+        file.write(''.join(f'{column}\t' for column in header) + '\n')
+        for block in blocks:
+            file.write(''.join([row_format.format(*row) for row in block]))
+    finally:
+        if path:
+            file.close()
+    if path:
+        print(f'# Truth table is written to {path}.')
+
+
+def print_cover(cover):
+    function, proven = cover
+    print(function)
+    if not proven:
+        print('# The result may be not minimal.')
+
+
+def print_satisfiability(calculator):
+    values = calculator.satisfying_assignment()
+    if values is None:
+        print('# Function is not satisfiable.')
+    else:
+        print(f'# Function is satisfiable: {format_assignment(values)}')
+
+
+def print_tautology(calculator):
+    values = calculator.satisfying_assignment(0)
+    if values is None:
+        print('# Function is a tautology.')
+    else:
+        print(f'# Function is not a tautology: {format_assignment(values)}')
+
+
+def print_equivalence(calculator, other):
+    equivalent, values = calculator.equivalent(other)
+    if equivalent:
+        print('# Functions are equivalent.')
+    else:
+        print(f'# Functions differ on: {format_assignment(values)}')
+
+
+def format_assignment(values):
+    return ', '.join(f'{name} = {value}' for name, value in values.items())
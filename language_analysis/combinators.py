@@ -161,3 +161,40 @@ class Phrase(Parser):
         if result and result.position == len(tokens):
             return result
         return None
+
+
+class MemoTable(object):
+    """Packrat memo table shared by Memo parsers, disabled by default."""
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.results = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __repr__(self):
+        return (f'MemoTable: enabled={self.enabled}, '
+                f'hits={self.hits}, misses={self.misses}')
+
+    def reset(self):
+        self.results.clear()
+
+
+class Memo(Parser):
+    def __init__(self, parser, table):
+        self.parser = parser
+        self.table = table
+
+    def __call__(self, tokens, position):
+        if not self.table.enabled:
+            return self.parser(tokens, position)
+        key = self, position
+        if key in self.table.results:
+            self.table.hits += 1
+            memo = self.table.results[key]
+        else:
+            self.table.misses += 1
+            result = self.parser(tokens, position)
+            memo = (result.tree, result.position) if result else None
+            self.table.results[key] = memo
+        # New result every time because Process changes trees of results.
+        return Result(*memo) if memo else None
@@ -1,4 +1,5 @@
 import re
+import codecs
 
 
 class Lexer(object):
@@ -19,27 +20,61 @@ class Lexer(object):
                 'Token patterns should be a container of pairs '
                 'consisting of a string pattern and a tag.')
         self._token_patterns = value
+        self._tags = {f'T{i}': tag for i, (_, tag) in enumerate(value)}
+        self._regex = re.compile('|'.join(
+            f'(?P<T{i}>{pattern})' for i, (pattern, _) in enumerate(value)))
 
     def __call__(self, characters):
-        position = 0
-        tokens = []
+        return list(self.tokens(characters))
 
+    def tokens(self, characters):
+        """Yields tokens one by one instead of collecting them."""
+        position = 0
         while position < len(characters):
-            for pattern, tag in self.token_patterns:
-                match = re.compile(pattern).match(characters, position)
-                if match:
-                    term = match.group(0)
-                    if tag is not None:
-                        token = term, tag
-                        tokens.append(token)
+            match = self._regex.match(characters, position)
+            token, position = self._token(match, characters, position)
+            if token is not None:
+                yield token
+
+    def stream(self, source, chunk_size=65536, lookahead=64):
+        """
+        Yields tokens of characters read from file-like source by chunks.
+        Source may be a text file, a binary file or mmap, binary data
+        is decoded as UTF-8.
+
+        A token is taken only if at least lookahead characters follow it
+        or the source is exhausted, so no token may be longer than that.
+
+        """
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        buffer = ''
+        final = False
+        while not final:
+            chunk = source.read(chunk_size)
+            final = not chunk
+            if isinstance(chunk, (bytes, bytearray)):
+                chunk = decoder.decode(chunk, final)
+            buffer += chunk
+
+            position = 0
+            while position < len(buffer):
+                match = self._regex.match(buffer, position)
+                if not final and (match is None
+                                  or match.end() + lookahead > len(buffer)):
                     break
-            else:
-                raise ValueError(
-                    f'Illegal character "{characters[position]}" '
-                    'for contained token expressions!')
-            position = match.end(0)
+                token, position = self._token(match, buffer, position)
+                if token is not None:
+                    yield token
+            buffer = buffer[position:]
 
-        return tokens
+    def _token(self, match, characters, position):
+        if match is None or match.end() == position:
+            raise ValueError(
+                f'Illegal character "{characters[position]}" '
+                'for contained token expressions!')
+        tag = self._tags[match.lastgroup]
+        token = (match.group(0), tag) if tag is not None else None
+        return token, match.end()
 
     @staticmethod
     def _is_token_patterns(checking):
@@ -0,0 +1,176 @@
+"""
+SQLite file keeping calculation results between sessions.
+
+Results are the values of the shared result cache pickled under the text
+of their cache keys, which start with the canonical key of expression.
+The store is consulted by the result cache on misses when it is opened:
+
+    import persistent_store
+    persistent_store.open_store('~/.logy.sqlite')
+
+Files written by another FORMAT_VERSION are cleared on opening, so the
+version must be increased whenever pickled classes or keys change.
+
+"""
+import os
+import time
+import pickle
+import sqlite3
+
+import result_cache
+
+FORMAT_VERSION = 1
+
+
+class PersistentStore(object):
+    """
+    Results stored in SQLite file, the least recently used are deleted
+    when their total size exceeds max_bytes. The total is kept in meta
+    table, eviction deletes down to LOW_WATER of max_bytes at once and
+    use times of read results are written in batches with next write.
+
+    """
+    LOW_WATER = 0.9
+    USED_BATCH = 256
+
+    def __init__(self, path, max_bytes=2 ** 30):
+        self.path = os.path.expanduser(path)
+        self.max_bytes = max_bytes
+        self.used = {}
+        self.connection = sqlite3.connect(self.path, timeout=30,
+                                          check_same_thread=False)
+        with self.connection:
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS meta '
+                '(name TEXT PRIMARY KEY, value TEXT)')
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, '
+                'value BLOB, size INTEGER, used REAL)')
+            self.connection.execute(
+                'CREATE INDEX IF NOT EXISTS results_used ON results (used)')
+            row = self.connection.execute(
+                "SELECT value FROM meta WHERE name = 'version'").fetchone()
+            if row is None or int(row[0]) != FORMAT_VERSION:
+                self.connection.execute('DELETE FROM results')
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO meta VALUES ('version', ?)",
+                    (str(FORMAT_VERSION),))
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO meta VALUES ('bytes', 0)")
+            self.connection.execute(
+                "INSERT OR IGNORE INTO meta SELECT 'bytes', "
+                'CAST(TOTAL(size) AS INTEGER) FROM results')
+
+    def __repr__(self):
+        return f'PersistentStore: {self.path}'
+
+    def get(self, key):
+        """Returns stored value or ResultCache.missing."""
+        text = repr(key)
+        try:
+            row = self.connection.execute(
+                'SELECT value FROM results WHERE key = ?',
+                (text,)).fetchone()
+            if row is None:
+                return result_cache.ResultCache.missing
+            self.used[text] = time.time()
+            if len(self.used) >= self.USED_BATCH:
+                with self.connection:
+                    self._write_used()
+            return pickle.loads(row[0])
+        except (sqlite3.Error, pickle.UnpicklingError, EOFError,
+                AttributeError, ImportError):
+            return result_cache.ResultCache.missing
+
+    def put(self, key, value):
+        """Stores value, results which can't be pickled are skipped."""
+        try:
+            data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, RecursionError):
+            return
+        if len(data) > self.max_bytes:
+            return
+        text = repr(key)
+        try:
+            with self.connection:
+                row = self.connection.execute(
+                    'SELECT size FROM results WHERE key = ?',
+                    (text,)).fetchone()
+                self.connection.execute(
+                    'INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)',
+                    (text, data, len(data), time.time()))
+                self.used.pop(text, None)
+                self._write_used()
+                self._add_bytes(len(data) - (row[0] if row else 0))
+        except sqlite3.Error:
+            pass
+
+    def clear(self):
+        self.used.clear()
+        with self.connection:
+            self.connection.execute('DELETE FROM results')
+            self.connection.execute(
+                "UPDATE meta SET value = 0 WHERE name = 'bytes'")
+
+    def close(self):
+        try:
+            with self.connection:
+                self._write_used()
+        except sqlite3.Error:
+            pass
+        self.connection.close()
+
+    def stats(self):
+        entries, = self.connection.execute(
+            'SELECT COUNT(*) FROM results').fetchone()
+        return {'path': self.path, 'entries': entries,
+                'bytes': self._bytes(), 'max_bytes': self.max_bytes,
+                'version': FORMAT_VERSION}
+
+    def _bytes(self):
+        value, = self.connection.execute(
+            "SELECT value FROM meta WHERE name = 'bytes'").fetchone()
+        return int(value)
+
+    def _add_bytes(self, change):
+        """Changes total size and evicts results if it exceeds the limit."""
+        self.connection.execute(
+            "UPDATE meta SET value = value + ? WHERE name = 'bytes'",
+            (change,))
+        size = self._bytes()
+        if size <= self.max_bytes:
+            return
+        excess = size - int(self.max_bytes * self.LOW_WATER)
+        keys = []
+        removed = 0
+        for key, entry_size in self.connection.execute(
+                'SELECT key, size FROM results ORDER BY used'):
+            keys.append((key,))
+            removed += entry_size
+            if removed >= excess:
+                break
+        self.connection.executemany('DELETE FROM results WHERE key = ?', keys)
+        self.connection.execute(
+            "UPDATE meta SET value = value - ? WHERE name = 'bytes'",
+            (removed,))
+
+    def _write_used(self):
+        if self.used:
+            self.connection.executemany(
+                'UPDATE results SET used = ? WHERE key = ?',
+                [(used, key) for key, used in self.used.items()])
+            self.used.clear()
+
+
+def open_store(path, max_bytes=2 ** 30):
+    """Opens store and connects it to the shared result cache."""
+    close_store()
+    result_cache.cache.store = PersistentStore(path, max_bytes)
+    return result_cache.cache.store
+
+
+def close_store():
+    store = result_cache.cache.store
+    if store is not None:
+        result_cache.cache.store = None
+        store.close()
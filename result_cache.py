@@ -0,0 +1,153 @@
+import sys
+import hashlib
+import functools
+from collections import OrderedDict
+from weakref import WeakKeyDictionary
+
+import boolean_ast as ast
+
+
+class ResultCache(object):
+    """
+    LRU cache of calculation results limited by estimated size in bytes.
+    Keys start with canonical key of expression, so calculators of the
+    same function share results. If store is set, results missing in
+    memory are looked up in it and new persistent results are written
+    to it.
+
+    """
+    missing = object()
+
+    def __init__(self, max_bytes=256 * 2 ** 20):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.store_hits = 0
+        self.store = None
+
+    def __repr__(self):
+        return f'ResultCache: {self.stats()}'
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key, persistent=True):
+        """Returns cached value or ResultCache.missing."""
+        entry = self.entries.get(key)
+        if entry is None:
+            if persistent and self.store is not None:
+                value = self.store.get(key)
+                if value is not self.missing:
+                    self.store_hits += 1
+                    self._put(key, value)
+                    return value
+            self.misses += 1
+            return self.missing
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key, value, persistent=True):
+        self._put(key, value)
+        if persistent and self.store is not None:
+            self.store.put(key, value)
+
+    def clear(self):
+        self.entries.clear()
+        self.bytes = 0
+
+    def stats(self):
+        requests = self.hits + self.misses
+        return {
+            'entries': len(self.entries),
+            'bytes': self.bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / requests if requests else 0.0,
+            'store_hits': self.store_hits,
+        }
+
+    def _put(self, key, value):
+        size = size_of(value)
+        if size > self.max_bytes:
+            return
+        if key in self.entries:
+            self.bytes -= self.entries.pop(key)[1]
+        self.entries[key] = value, size
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            _, (_, evicted_size) = self.entries.popitem(last=False)
+            self.bytes -= evicted_size
+            self.evictions += 1
+
+
+cache = ResultCache()
+_keys = WeakKeyDictionary()
+
+
+def configure(max_bytes):
+    """Sets byte budget of the shared cache evicting extra results."""
+    cache.max_bytes = max_bytes
+    while cache.bytes > cache.max_bytes:
+        _, (_, evicted_size) = cache.entries.popitem(last=False)
+        cache.bytes -= evicted_size
+        cache.evictions += 1
+
+
+def canonical_key(expression):
+    """
+    Returns digest of expression structure, equal for equal trees
+    whichever objects they are made of.
+
+    """
+    if expression in _keys:
+        return _keys[expression]
+    digests = {}
+    for node in expression.postorder():
+        if node in _keys:
+            digests[id(node)] = _keys[node]
+            continue
+        if isinstance(node, ast.ConstantExpression):
+            payload = repr(node.value)
+        elif isinstance(node, ast.VariableExpression):
+            payload = node.name
+        else:
+            payload = ','.join(digests[id(o)] for o in node.operands)
+        text = f'{node.__class__.__name__}({payload})'
+        digests[id(node)] = hashlib.sha1(text.encode()).hexdigest()
+        _keys[node] = digests[id(node)]
+    return digests[id(expression)]
+
+
+def cached(kind):
+    """Caches results of BooleanCalculator method by function and args."""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(calculator, *args, **kwargs):
+            key = (canonical_key(calculator.function), kind,
+                   *args, *sorted(kwargs.items()))
+            result = cache.get(key)
+            if result is ResultCache.missing:
+                result = method(calculator, *args, **kwargs)
+                cache.put(key, result)
+            return result
+        return wrapper
+    return decorator
+
+
+def size_of(value):
+    """Returns estimated size of cached value in bytes."""
+    if isinstance(value, int):
+        return sys.getsizeof(value)
+    if isinstance(value, ast.Expression):
+        return 64 * sum(1 for _ in value.postorder())
+    if isinstance(value, (tuple, list)):
+        return sys.getsizeof(value) + sum(size_of(v) for v in value)
+    if hasattr(value, 'nbytes'):
+        return value.nbytes
+    return sys.getsizeof(value)
@@ -0,0 +1,326 @@
+import heapq
+
+import boolean_ast as ast
+
+
+class CNF(object):
+    """
+    Tseitin encoding of expression into clauses of equal satisfiability.
+
+    Variables are numbered from 1, literal of variable v is 2 * v if it
+    is positive and 2 * v + 1 if it is negative, so literal ^ 1 is its
+    negation. Every operation node gets its own variable (negation only
+    flips literal) and clauses making it equal to the operation of its
+    operands, so the encoding is linear in the size of expression.
+
+    """
+    def __init__(self, expression):
+        self.clauses = []
+        self.variable_count = 0
+        self.inputs = {}
+        literals = {}
+        for node in expression.postorder():
+            literals[node] = self._encode(
+                node, [literals[o] for o in node.operands])
+        self.root = literals[expression]
+
+    def __repr__(self):
+        return (f'CNF: {self.variable_count} variables, '
+                f'{len(self.clauses)} clauses')
+
+    def new_variable(self):
+        self.variable_count += 1
+        return 2 * self.variable_count
+
+    def _encode(self, node, operands):
+        if isinstance(node, ast.VariableExpression):
+            literal = self.new_variable()
+            self.inputs[node.name] = literal
+            return literal
+        if isinstance(node, ast.ConstantExpression):
+            literal = self.new_variable()
+            self.clauses.append([literal if node.value else literal ^ 1])
+            return literal
+        if isinstance(node, ast.NotExpression):
+            return operands[0] ^ 1
+        a, b = operands
+        encoding = gates[node.__class__]
+        return encoding(self, a, b)
+
+    def conjunction(self, a, b):
+        g = self.new_variable()
+        self.clauses += [[g ^ 1, a], [g ^ 1, b], [g, a ^ 1, b ^ 1]]
+        return g
+
+    def disjunction(self, a, b):
+        g = self.new_variable()
+        self.clauses += [[g, a ^ 1], [g, b ^ 1], [g ^ 1, a, b]]
+        return g
+
+    def exclusive_disjunction(self, a, b):
+        g = self.new_variable()
+        self.clauses += [[g ^ 1, a, b], [g ^ 1, a ^ 1, b ^ 1],
+                         [g, a ^ 1, b], [g, a, b ^ 1]]
+        return g
+
+
+gates = {
+    ast.AndExpression: CNF.conjunction,
+    ast.OrExpression: CNF.disjunction,
+    ast.XorExpression: CNF.exclusive_disjunction,
+    ast.NandExpression: lambda cnf, a, b: cnf.conjunction(a, b) ^ 1,
+    ast.NorExpression: lambda cnf, a, b: cnf.disjunction(a, b) ^ 1,
+    ast.ImplyExpression: lambda cnf, a, b: cnf.disjunction(a ^ 1, b),
+    ast.EqExpression:
+        lambda cnf, a, b: cnf.exclusive_disjunction(a, b) ^ 1,
+}
+
+
+class Solver(object):
+    """
+    CDCL satisfiability solver over clauses of literals like in CNF.
+
+    Two literals of every clause are watched, so unit propagation only
+    visits clauses whose watched literal became false. Conflicts are
+    analysed to the first unique implication point, learnt clauses are
+    added and the solver jumps back to the second highest level of the
+    learnt clause. Decisions take variables of highest activity, which
+    grows for variables of recent conflicts, with their saved phase.
+
+    """
+    restart_interval = 100
+    restart_growth = 1.5
+    activity_decay = 0.95
+
+    def __init__(self, variable_count, clauses=()):
+        self.variable_count = variable_count
+        size = variable_count + 1
+        self.values = [-1] * size
+        self.levels = [0] * size
+        self.reasons = [None] * size
+        self.phases = [1] * size
+        self.activities = [0.0] * size
+        self.activity_increment = 1.0
+        self.order = [(0.0, v) for v in range(1, size)]
+        self.clauses = []
+        self.watches = [[] for _ in range(2 * size)]
+        self.trail = []
+        self.trail_limits = []
+        self.propagated = 0
+        self.conflicts = 0
+        self.consistent = True
+        for clause in clauses:
+            self.add_clause(clause)
+
+    def __repr__(self):
+        return (f'Solver: {self.variable_count} variables, '
+                f'{len(self.clauses)} clauses, {self.conflicts} conflicts')
+
+    def add_clause(self, literals):
+        """Adds clause of literals on decision level 0."""
+        clause = []
+        for literal in literals:
+            if literal ^ 1 in clause:
+                return
+            if literal not in clause:
+                clause.append(literal)
+        clause = [literal for literal in clause
+                  if self._value(literal) != 0]
+        if any(self._value(literal) == 1 for literal in clause):
+            return
+        if not clause:
+            self.consistent = False
+        elif len(clause) == 1:
+            self._assign(clause[0], None)
+            if self._propagate() is not None:
+                self.consistent = False
+        else:
+            self._watch(clause)
+
+    def solve(self):
+        """
+        Returns list of variable values indexed by variable (index 0 is
+        unused) if clauses are satisfiable, otherwise None.
+
+        """
+        if not self.consistent:
+            return None
+        interval = self.restart_interval
+        conflicts_limit = self.conflicts + interval
+        while True:
+            conflict = self._propagate()
+            if conflict is not None:
+                self.conflicts += 1
+                if not self.trail_limits:
+                    self.consistent = False
+                    return None
+                learnt, level = self._analyze(conflict)
+                self._backtrack(level)
+                if len(learnt) == 1:
+                    self._assign(learnt[0], None)
+                else:
+                    self._watch(learnt)
+                    self._assign(learnt[0], learnt)
+                self._decay_activities()
+                continue
+            if self.conflicts >= conflicts_limit:
+                interval = int(interval * self.restart_growth)
+                conflicts_limit = self.conflicts + interval
+                self._backtrack(0)
+            variable = self._pick_variable()
+            if variable is None:
+                return list(self.values)
+            self.trail_limits.append(len(self.trail))
+            self._assign(2 * variable + 1 - self.phases[variable], None)
+
+    def _value(self, literal):
+        """Returns 1 or 0 if literal is true or false, -1 if unassigned."""
+        value = self.values[literal >> 1]
+        if value < 0:
+            return value
+        return value ^ (literal & 1)
+
+    def _assign(self, literal, reason):
+        variable = literal >> 1
+        self.values[variable] = 1 ^ (literal & 1)
+        self.levels[variable] = len(self.trail_limits)
+        self.reasons[variable] = reason
+        self.trail.append(literal)
+
+    def _watch(self, clause):
+        self.clauses.append(clause)
+        self.watches[clause[0]].append(clause)
+        self.watches[clause[1]].append(clause)
+
+    def _propagate(self):
+        """Returns conflicting clause or None after unit propagation."""
+        values = self.values
+        while self.propagated < len(self.trail):
+            false_literal = self.trail[self.propagated] ^ 1
+            self.propagated += 1
+            watchers = self.watches[false_literal]
+            kept = []
+            for position, clause in enumerate(watchers):
+                if clause[0] == false_literal:
+                    clause[0], clause[1] = clause[1], false_literal
+                first = clause[0]
+                value = values[first >> 1]
+                if value >= 0 and value ^ (first & 1):
+                    kept.append(clause)
+                    continue
+                for index in range(2, len(clause)):
+                    literal = clause[index]
+                    value = values[literal >> 1]
+                    if value < 0 or value ^ (literal & 1):
+                        clause[1], clause[index] = literal, false_literal
+                        self.watches[literal].append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    value = values[first >> 1]
+                    if value >= 0:
+                        kept += watchers[position + 1:]
+                        self.watches[false_literal] = kept
+                        return clause
+                    self._assign(first, clause)
+            self.watches[false_literal] = kept
+        return None
+
+    def _analyze(self, conflict):
+        """
+        Returns learnt clause with asserting literal first and level to
+        jump back to.
+
+        """
+        level = len(self.trail_limits)
+        seen = set()
+        learnt = [None]
+        pending = 0
+        literal = None
+        clause = conflict
+        position = len(self.trail)
+        while True:
+            for other in clause:
+                if other == literal:
+                    continue
+                variable = other >> 1
+                if variable in seen or not self.levels[variable]:
+                    continue
+                seen.add(variable)
+                self._bump(variable)
+                if self.levels[variable] == level:
+                    pending += 1
+                else:
+                    learnt.append(other)
+            position -= 1
+            while self.trail[position] >> 1 not in seen:
+                position -= 1
+            literal = self.trail[position]
+            clause = self.reasons[literal >> 1]
+            pending -= 1
+            if not pending:
+                break
+        learnt[0] = literal ^ 1
+        if len(learnt) == 1:
+            return learnt, 0
+        second = max(range(1, len(learnt)),
+                     key=lambda i: self.levels[learnt[i] >> 1])
+        learnt[1], learnt[second] = learnt[second], learnt[1]
+        return learnt, self.levels[learnt[1] >> 1]
+
+    def _backtrack(self, level):
+        if len(self.trail_limits) <= level:
+            return
+        start = self.trail_limits[level]
+        for literal in self.trail[start:]:
+            variable = literal >> 1
+            self.phases[variable] = self.values[variable]
+            self.values[variable] = -1
+            self.reasons[variable] = None
+            heapq.heappush(self.order,
+                           (-self.activities[variable], variable))
+        del self.trail[start:]
+        del self.trail_limits[level:]
+        self.propagated = start
+
+    def _pick_variable(self):
+        while self.order:
+            activity, variable = heapq.heappop(self.order)
+            if (self.values[variable] < 0
+                    and -activity == self.activities[variable]):
+                return variable
+        for variable in range(1, self.variable_count + 1):
+            if self.values[variable] < 0:
+                return variable
+        return None
+
+    def _bump(self, variable):
+        self.activities[variable] += self.activity_increment
+        if self.activities[variable] > 1e100:
+            self.activities = [a * 1e-100 for a in self.activities]
+            self.activity_increment *= 1e-100
+            self.order = [(-self.activities[v], v)
+                          for v in range(1, self.variable_count + 1)
+                          if self.values[v] < 0]
+            heapq.heapify(self.order)
+        elif self.values[variable] < 0:
+            heapq.heappush(self.order,
+                           (-self.activities[variable], variable))
+
+    def _decay_activities(self):
+        self.activity_increment /= self.activity_decay
+
+
+def find_assignment(expression, value=1):
+    """
+    Returns values of sorted variables making expression equal to value
+    or None if there are no such values.
+
+    """
+    cnf = CNF(expression)
+    solver = Solver(cnf.variable_count, cnf.clauses)
+    solver.add_clause([cnf.root if value else cnf.root ^ 1])
+    values = solver.solve()
+    if values is None:
+        return None
+    return [values[cnf.inputs[name] >> 1] for name in sorted(cnf.inputs)]
@@ -0,0 +1,284 @@
+"""
+Serves Logy calculations as JSON lines over TCP.
+
+Every request line is a JSON object like
+
+    {"id": 1, "operation": "min", "expression": "a * b + -a * c",
+     "option": "--espresso", "deadline": 5}
+
+where operation is one of the operations of batch mode (table, fdnf,
+fcnf, poly, min, sat, taut, const) or "stats", and option and deadline in
+seconds are optional. Every response line is the batch result record with
+"id" of request, responses of one connection may come in any order.
+
+    python server.py serve --port 8765 --workers 4
+    python server.py load --port 8765 --requests 10000 --concurrency 64
+
+Jobs run in a process pool. Identical requests in flight share one job,
+a request waiting longer than its deadline gets an error while the job
+goes on for others, and connections are not read while max_pending
+requests are in progress.
+
+"""
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import batch
+from formulas import random_expression
+
+
+class CalculatorServer(object):
+    def __init__(self, host='127.0.0.1', port=8765, workers=None,
+                 max_pending=256, deadline=30.0, store=None):
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.max_pending = max_pending
+        self.deadline = deadline
+        self.store = store
+        self.in_flight = {}
+        self.counters = dict.fromkeys(
+            ['requests', 'jobs', 'coalesced', 'deadline exceeded',
+             'errors'], 0)
+        self.pending = 0
+        self.executor = None
+        self.server = None
+        self._slots = None
+
+    def __repr__(self):
+        return f'CalculatorServer: {self.host}:{self.port}'
+
+    async def start(self):
+        self.executor = ProcessPoolExecutor(
+            self.workers, initializer=batch.initialize_worker,
+            initargs=(self.store,))
+        self._slots = asyncio.Semaphore(self.max_pending)
+        self.server = await asyncio.start_server(
+            self.handle_connection, self.host, self.port, limit=2 ** 20)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+
+    async def handle_connection(self, reader, writer):
+        lock = asyncio.Lock()
+        tasks = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                await self._slots.acquire()
+                self.pending += 1
+                task = asyncio.ensure_future(
+                    self._respond(line, writer, lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.wait(tasks)
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, line, writer, lock):
+        try:
+            response = await self.answer(line)
+            async with lock:
+                writer.write(json.dumps(response).encode() + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.pending -= 1
+            self._slots.release()
+
+    async def answer(self, line):
+        """Returns response to request line."""
+        self.counters['requests'] += 1
+        try:
+            request = json.loads(line)
+            request_id = request.get('id')
+            operation = str(request['operation'])
+            expression = str(request.get('expression', ''))
+            option = str(request.get('option', ''))
+            deadline = min(float(request.get('deadline', self.deadline)),
+                           self.deadline)
+        except (ValueError, KeyError, TypeError, AttributeError):
+            self.counters['errors'] += 1
+            return {'error': 'Request is not correct.'}
+
+        if operation == 'stats':
+            return {'id': request_id, 'operation': operation,
+                    'result': self.stats()}
+        key = operation, option, expression
+        job = self.in_flight.get(key)
+        if job is None:
+            self.counters['jobs'] += 1
+            job = asyncio.get_running_loop().run_in_executor(
+                self.executor, batch.execute, operation, option,
+                expression, self.deadline)
+            self.in_flight[key] = job
+            job.add_done_callback(lambda _: self.in_flight.pop(key, None))
+        else:
+            self.counters['coalesced'] += 1
+        try:
+            record = await asyncio.wait_for(asyncio.shield(job), deadline)
+        except asyncio.TimeoutError:
+            self.counters['deadline exceeded'] += 1
+            record = {'operation': operation, 'expression': expression,
+                      'error': f'Deadline of {deadline} s is exceeded.'}
+        except Exception as error:
+            record = {'operation': operation, 'expression': expression,
+                      'error': f'{error.__class__.__name__}: {error}'}
+        if 'error' in record:
+            self.counters['errors'] += 1
+        return {'id': request_id, **record}
+
+    def stats(self):
+        return {**self.counters, 'in flight': len(self.in_flight),
+                'pending': self.pending}
+
+
+class Client(object):
+    """Connection to server sending requests and matching responses."""
+    def __init__(self, host='127.0.0.1', port=8765):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+        self.waiters = {}
+        self.next_id = 0
+        self._receiver = None
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(
+            self.host, self.port, limit=2 ** 26)
+        self._receiver = asyncio.ensure_future(self._receive())
+
+    async def close(self):
+        self.writer.close()
+        await self._receiver
+
+    async def request(self, operation, expression='', **fields):
+        """Returns response to request of operation on expression."""
+        self.next_id += 1
+        request = {'id': self.next_id, 'operation': operation,
+                   'expression': expression, **fields}
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters[self.next_id] = waiter
+        self.writer.write(json.dumps(request).encode() + b'\n')
+        await self.writer.drain()
+        return await waiter
+
+    async def _receive(self):
+        try:
+            async for line in self.reader:
+                response = json.loads(line)
+                waiter = self.waiters.pop(response.get('id'), None)
+                if waiter is not None and not waiter.done():
+                    waiter.set_result(response)
+        except ConnectionError:
+            pass
+        for waiter in self.waiters.values():
+            if not waiter.done():
+                waiter.set_exception(ConnectionError('Connection closed.'))
+
+
+async def load_test(host, port, requests, concurrency, variables=6, seed=0):
+    """
+    Sends requests on generated formulas from concurrency coroutines and
+    returns throughput, latency percentiles and count of error responses
+    (constant generated functions are reported as errors too).
+
+    """
+    rand = random.Random(seed)
+    operations = ['table', 'fdnf', 'fcnf', 'poly', 'min', 'sat', 'taut']
+    jobs = [(rand.choice(operations),
+             random_expression(rand, variables, 3 * variables, 6))
+            for _ in range(requests)]
+    client = Client(host, port)
+    await client.connect()
+    latencies = []
+    errors = 0
+
+    async def worker(start):
+        nonlocal errors
+        for operation, expression in jobs[start::concurrency]:
+            sent = time.perf_counter()
+            response = await client.request(operation, expression)
+            latencies.append(time.perf_counter() - sent)
+            errors += 'error' in response
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    seconds = time.perf_counter() - started
+    stats = (await client.request('stats'))['result']
+    await client.close()
+    latencies.sort()
+    return {
+        'requests': requests,
+        'seconds': seconds,
+        'requests_per_second': requests / seconds,
+        'p50_ms': 1000 * latencies[len(latencies) // 2],
+        'p99_ms': 1000 * latencies[int(len(latencies) * 0.99)],
+        'errors': errors,
+        'server': stats,
+    }
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(
+        description='Serves Logy as JSON lines over TCP.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    serve = commands.add_parser('serve', help='runs server')
+    load = commands.add_parser('load', help='load tests running server')
+    for command in (serve, load):
+        command.add_argument('--host', default='127.0.0.1')
+        command.add_argument('--port', type=int, default=8765)
+    serve.add_argument('--workers', type=int, default=None)
+    serve.add_argument('--max-pending', type=int, default=256)
+    serve.add_argument('--deadline', type=float, default=30.0,
+                       help='default and largest deadline in seconds')
+    serve.add_argument('--store',
+                       help='SQLite file keeping results between runs')
+    load.add_argument('--requests', type=int, default=1000)
+    load.add_argument('--concurrency', type=int, default=32)
+    load.add_argument('--variables', type=int, default=6)
+    options = parser.parse_args(arguments)
+
+    if options.command == 'serve':
+        server = CalculatorServer(options.host, options.port,
+                                  options.workers, options.max_pending,
+                                  options.deadline, options.store)
+        print(f'# Logy serves on {options.host}:{options.port}.',
+              file=sys.stderr)
+        try:
+            asyncio.run(server.serve_forever())
+        except KeyboardInterrupt:
+            pass
+    else:
+        result = asyncio.run(load_test(
+            options.host, options.port, options.requests,
+            options.concurrency, options.variables))
+        print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
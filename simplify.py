@@ -0,0 +1,146 @@
+import boolean_ast as ast
+from bdd import BDD
+
+
+def simplify(expression, values=None):
+    """
+    Returns equivalent expression rewritten bottom-up by constant folding,
+    double negation, idempotence, complement, absorption and x ^ x
+    cancellation rules. Variables named in values mapping are replaced by
+    their constant values first.
+
+    """
+    values = values or {}
+    results = {}
+    for node in expression.postorder():
+        if isinstance(node, ast.VariableExpression) and node.name in values:
+            results[node] = ast.ConstantExpression(values[node.name])
+        elif node.operands:
+            operands = [results[o] for o in node.operands]
+            results[node] = rules[node.__class__](*operands)
+        else:
+            results[node] = node
+    return results[expression]
+
+
+def essential_variables(expression):
+    """Returns variables the value of expression depends on."""
+    variables = sorted(expression.variables)
+    bdd = BDD(variables)
+    stack = [bdd.build(expression)]
+    visited = set()
+    levels = set()
+    while stack:
+        node = stack.pop()
+        if node in visited or bdd.is_constant(node):
+            continue
+        visited.add(node)
+        level, low, high = bdd.nodes[node]
+        levels.add(level)
+        stack += [low, high]
+    return {variables[level] for level in levels}
+
+
+def reduced(expression):
+    """
+    Returns simplified expression without dummy variables, which do not
+    change its value. They are set to 0 and folded away.
+
+    """
+    expression = simplify(expression)
+    dummies = expression.variables - essential_variables(expression)
+    if dummies:
+        expression = simplify(expression, dict.fromkeys(dummies, 0))
+    return expression
+
+
+def constant_of(node):
+    if isinstance(node, ast.ConstantExpression):
+        return node.value
+    return None
+
+
+def are_complement(a, b):
+    return ((isinstance(a, ast.NotExpression) and a.expression is b)
+            or (isinstance(b, ast.NotExpression) and b.expression is a))
+
+
+def negation(a):
+    if constant_of(a) is not None:
+        return ast.ConstantExpression(1 - a.value)
+    if isinstance(a, ast.NotExpression):
+        return a.expression
+    return ast.NotExpression(a)
+
+
+def conjunction(a, b):
+    if constant_of(a) == 0 or constant_of(b) == 0 or are_complement(a, b):
+        return ast.ConstantExpression(0)
+    if constant_of(a) == 1:
+        return b
+    if constant_of(b) == 1 or a is b:
+        return a
+    if isinstance(b, ast.OrExpression) and a in b.operands:
+        return a
+    if isinstance(a, ast.OrExpression) and b in a.operands:
+        return b
+    return ast.AndExpression(a, b)
+
+
+def disjunction(a, b):
+    if constant_of(a) == 1 or constant_of(b) == 1 or are_complement(a, b):
+        return ast.ConstantExpression(1)
+    if constant_of(a) == 0:
+        return b
+    if constant_of(b) == 0 or a is b:
+        return a
+    if isinstance(b, ast.AndExpression) and a in b.operands:
+        return a
+    if isinstance(a, ast.AndExpression) and b in a.operands:
+        return b
+    return ast.OrExpression(a, b)
+
+
+def exclusive_disjunction(a, b):
+    if a is b:
+        return ast.ConstantExpression(0)
+    if are_complement(a, b):
+        return ast.ConstantExpression(1)
+    if constant_of(a) is not None:
+        return b if a.value == 0 else negation(b)
+    if constant_of(b) is not None:
+        return a if b.value == 0 else negation(a)
+    return ast.XorExpression(a, b)
+
+
+def negated_rule(rule, positive_class, negative_class):
+    """Returns rule of negated operation, keeping its node if no rule fits."""
+    def negated(a, b):
+        result = rule(a, b)
+        if result is positive_class(a, b):
+            return negative_class(a, b)
+        return negation(result)
+    return negated
+
+
+def implication(a, b):
+    result = disjunction(negation(a), b)
+    if result is ast.OrExpression(negation(a), b):
+        return ast.ImplyExpression(a, b)
+    return result
+
+
+rules = {
+    ast.NotExpression: negation,
+    ast.AndExpression: conjunction,
+    ast.OrExpression: disjunction,
+    ast.XorExpression: exclusive_disjunction,
+    ast.NandExpression:
+        negated_rule(conjunction, ast.AndExpression, ast.NandExpression),
+    ast.NorExpression:
+        negated_rule(disjunction, ast.OrExpression, ast.NorExpression),
+    ast.EqExpression:
+        negated_rule(exclusive_disjunction, ast.XorExpression,
+                     ast.EqExpression),
+    ast.ImplyExpression: implication,
+}
@@ -0,0 +1,151 @@
+"""
+Binary format of truth tables, all numbers are little-endian:
+
+    magic          6 bytes   b'LOGYTT'
+    version        uint16    2
+    variables      uint32    count of variables n
+    names length   uint32    length of names in bytes
+    names          UTF-8     variable names, function name and canonical
+                             key of function joined by \\n
+    padding        zeros     up to offset divisible by 8
+    outputs        packed    ceil(2^n / 8) bytes, output of row i is the bit
+                             i % 8 of byte i // 8, unused bits are zeros
+
+Rows are ordered like in BooleanCalculator, the first variable is the most
+significant bit of the row index. Function name is only displayed, the
+function is identified by its key. Version 1 files have no key and are
+still read.
+
+"""
+import mmap
+import struct
+
+MAGIC = b'LOGYTT'
+VERSION = 2
+HEADER = struct.Struct('<6sHII')
+
+
+class TruthTable(object):
+    """
+    Truth table as packed output bits, data may be bytes or memoryview of
+    a memory-mapped file.
+
+    """
+    def __init__(self, variables, function_name, data, key=None):
+        self.variables = list(variables)
+        self.function_name = function_name
+        self.key = key
+        self.rows = 2 ** len(self.variables)
+        if len(data) != packed_size(self.rows):
+            raise ValueError('Size of data does not match variables count.')
+        self.data = data
+        self._mapping = None
+
+    def __repr__(self):
+        return f'TruthTable: {self.function_name}, {self.rows} rows'
+
+    def __len__(self):
+        return self.rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
+
+    @classmethod
+    def from_integer(cls, variables, function_name, vector, key=None):
+        rows = 2 ** len(variables)
+        return cls(variables, function_name,
+                   vector.to_bytes(packed_size(rows), 'little'), key)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Returns table of file mapped to memory, outputs are read on access.
+
+        Raises:
+            ValueError: An error occurred loading file of other format.
+
+        """
+        with open(path, 'rb') as file:
+            mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            variables, function_name, key, offset = read_header(mapping)
+            size = packed_size(2 ** len(variables))
+            if len(mapping) < offset + size:
+                raise ValueError('Truth table file is truncated.')
+            view = memoryview(mapping)[offset:offset + size]
+            table = cls(variables, function_name, view, key)
+        except ValueError:
+            mapping.close()
+            raise
+        table._mapping = mapping
+        return table
+
+    def save(self, path):
+        names = '\n'.join(self.variables + [self.function_name,
+                                            self.key or '']).encode()
+        header = HEADER.pack(MAGIC, VERSION, len(self.variables), len(names))
+        padding = -(len(header) + len(names)) % 8
+        with open(path, 'wb') as file:
+            file.write(header + names + bytes(padding))
+            file.write(self.data)
+
+    def close(self):
+        """
+        Closes mapped file. If arrays made from data are still alive, the
+        mapping is only dropped and closed when they are collected.
+
+        """
+        if self._mapping is not None:
+            self.data.release()
+            try:
+                self._mapping.close()
+            except BufferError:
+                pass
+            self._mapping = None
+
+    def value(self, index):
+        """Returns output of row of index."""
+        if not 0 <= index < self.rows:
+            raise IndexError('Truth table row index out of range.')
+        return (self.data[index >> 3] >> (index & 7)) & 1
+
+    def row(self, index):
+        """Returns values of variables and output of row of index."""
+        output = self.value(index)
+        count = len(self.variables)
+        values = [(index >> (count - 1 - i)) & 1 for i in range(count)]
+        return tuple(values) + (output,)
+
+    def to_integer(self):
+        return int.from_bytes(self.data, 'little')
+
+
+def read_header(buffer):
+    """
+    Returns variables, function name, its key (None in version 1) and
+    offset of outputs in buffer.
+
+    """
+    if len(buffer) < HEADER.size:
+        raise ValueError('It is not a truth table file.')
+    magic, version, count, names_length = HEADER.unpack_from(buffer)
+    if magic != MAGIC:
+        raise ValueError('It is not a truth table file.')
+    if version not in (1, VERSION):
+        raise ValueError(f'Unsupported truth table version: {version}.')
+    start = HEADER.size
+    names = bytes(buffer[start:start + names_length]).decode().split('\n')
+    if version == 1:
+        names.append('')
+    if len(names) != count + 2:
+        raise ValueError('Truth table header is damaged.')
+    offset = start + names_length
+    offset += -offset % 8
+    return names[:-2], names[-2], names[-1] or None, offset
+
+
+def packed_size(rows):
+    return (rows + 7) // 8